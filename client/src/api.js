@@ -124,3 +124,34 @@ export async function apiFetch(path, { method = "GET", body, auth = false } = {}
 
   return data;
 }
+
+// Streams an NDJSON endpoint, calling onLine(obj) for each line as it arrives.
+export async function apiStream(path, onLine, { auth = false } = {}) {
+  const headers = {};
+  if (auth) {
+    const token = getToken();
+    if (token) headers.Authorization = `Bearer ${token}`;
+  }
+
+  const res = await fetch(`${BASE_URL}${path}`, { headers });
+  if (!res.ok || !res.body) {
+    const err = new Error(`Request failed (${res.status})`);
+    err.status = res.status;
+    throw err;
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let newline;
+    while ((newline = buffer.indexOf("\n")) >= 0) {
+      const line = buffer.slice(0, newline).trim();
+      buffer = buffer.slice(newline + 1);
+      if (line) onLine(JSON.parse(line));
+    }
+  }
+}
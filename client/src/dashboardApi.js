@@ -1,9 +1,16 @@
-import { apiFetch } from "./api";
+import { apiFetch, apiStream } from "./api";
 
 export function getDashboard() {
   return apiFetch("/dashboard", { auth: true });
 }
 
-export function voteOnItem(dashboard_item_id, value) {
-  return apiFetch("/votes", { method: "POST", auth: true, body: { dashboard_item_id, value } });
+// Same items as getDashboard, delivered one by one as the server has them:
+// onEvent receives {type: "start", date}, {type: "item", item} and {type: "end"}.
+export function streamDashboard(onEvent) {
+  return apiStream("/dashboard/stream", onEvent, { auth: true });
+}
+
+// shown_payload: for meme items, the meme on screen (the server persists the one voted on)
+export function voteOnItem(dashboard_item_id, value, shown_payload) {
+  return apiFetch("/votes", { method: "POST", auth: true, body: { dashboard_item_id, value, shown_payload } });
 }
@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import { getDashboard, voteOnItem } from "../dashboardApi";
+import { streamDashboard, voteOnItem } from "../dashboardApi";
 import { clearToken } from "../auth";
 import { useNavigate } from "react-router-dom";
 import TopBar from "../components/TopBar";
@@ -51,8 +51,18 @@ export default function Dashboard() {
     setLoading(true);
     setError("");
     try {
-      const d = await getDashboard();
-      setData(d);
+      // render each item as soon as the server streams it
+      await streamDashboard((event) => {
+        if (event.type === "start") {
+          setData({ date: event.date, items: [] });
+          setLoading(false);
+        } else if (event.type === "item") {
+          setData((prev) => ({
+            ...prev,
+            items: [...prev.items.filter((it) => it.id !== event.item.id), event.item],
+          }));
+        }
+      });
     } catch (e) {
       // if token is invalid/expired, force logout
       if (e.status === 401) {
@@ -72,6 +82,9 @@ export default function Dashboard() {
   }, []);
 
   async function handleVote(itemId, value) {
+    const item = data?.items.find((it) => it.id === itemId);
+    const shownPayload = item?.item_type === "meme" ? item.payload : undefined;
+
     // optimistic UI update
     setData((prev) => {
       if (!prev) return prev;
@@ -84,7 +97,7 @@ export default function Dashboard() {
     });
 
     try {
-      await voteOnItem(itemId, value);
+      await voteOnItem(itemId, value, shownPayload);
     } catch (e) {
       // revert on failure
       setData((prev) => {
@@ -3,10 +3,8 @@ from alembic import context
 from sqlalchemy import engine_from_config, pool
 from logging.config import fileConfig
 
-# Fallback: load .env ONLY if DATABASE_URL not already set
-if not os.getenv("DATABASE_URL"):
-    from dotenv import load_dotenv
-    load_dotenv()
+# Load .env (existing environment variables, e.g. DATABASE_URL, take precedence)
+import config  # noqa: F401
 
 config = context.config
 
@@ -0,0 +1,47 @@
+"""vote_rollups counters and votes.previous_value
+
+Revision ID: a8f3d61c9e27
+Revises: e3a9f0c6b2d4
+Create Date: 2026-10-18 16:41:09.730518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8f3d61c9e27'
+down_revision: Union[str, Sequence[str], None] = 'e3a9f0c6b2d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('votes', sa.Column('previous_value', sa.Integer(), nullable=True))
+    op.create_table('vote_rollups',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('item_type', sa.String(length=20), nullable=False),
+    sa.Column('investor_type', sa.String(length=50), nullable=False),
+    sa.Column('up', sa.Integer(), nullable=False),
+    sa.Column('down', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'item_type', 'investor_type')
+    )
+    # seed from existing votes (same aggregate as vote_rollups.raw_aggregates)
+    op.execute(
+        "INSERT INTO vote_rollups (day, item_type, investor_type, up, down) "
+        "SELECT i.date, i.item_type, COALESCE(p.investor_type, 'unknown'), "
+        "SUM(CASE WHEN v.value = 1 THEN 1 ELSE 0 END), SUM(CASE WHEN v.value = -1 THEN 1 ELSE 0 END) "
+        "FROM votes v JOIN dashboard_items i ON v.dashboard_item_id = i.id "
+        "LEFT OUTER JOIN preferences p ON p.user_id = v.user_id "
+        "GROUP BY i.date, i.item_type, COALESCE(p.investor_type, 'unknown')"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('vote_rollups')
+    with op.batch_alter_table('votes') as batch_op:
+        batch_op.drop_column('previous_value')
@@ -0,0 +1,39 @@
+"""composite (user_id, date, id) index on dashboard_items
+
+Revision ID: b7c41e9a2d15
+Revises: 4d67832d0fd2
+Create Date: 2026-10-18 10:12:41.208311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c41e9a2d15'
+down_revision: Union[str, Sequence[str], None] = '4d67832d0fd2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Per-user date-range scans (dashboard history). On Postgres item_type is included
+    # so the page-of-days lookup and item ids come from an index-only scan.
+    op.create_index(
+        'ix_dashboard_items_user_date',
+        'dashboard_items',
+        ['user_id', 'date', 'id'],
+        unique=False,
+        postgresql_include=['item_type'],
+    )
+    # redundant now: every lookup by user_id can use the composite index's prefix
+    op.drop_index(op.f('ix_dashboard_items_user_id'), table_name='dashboard_items')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_dashboard_items_user_id'), 'dashboard_items', ['user_id'], unique=False)
+    op.drop_index('ix_dashboard_items_user_date', table_name='dashboard_items')
@@ -0,0 +1,94 @@
+"""content-addressed payloads table; dashboard_items reference it by hash
+
+Revision ID: e3a9f0c6b2d4
+Revises: b7c41e9a2d15
+Create Date: 2026-10-18 14:05:37.512904
+
+"""
+import hashlib
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a9f0c6b2d4'
+down_revision: Union[str, Sequence[str], None] = 'b7c41e9a2d15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+payloads = sa.table('payloads', sa.column('hash', sa.String), sa.column('body', sa.JSON))
+items = sa.table(
+    'dashboard_items',
+    sa.column('id', sa.Integer),
+    sa.column('payload', sa.JSON),
+    sa.column('payload_hash', sa.String),
+)
+
+
+def _hash(body) -> str:
+    # same encoding as payload_store.payload_hash (kept inline: migrations don't import app code)
+    canonical = json.dumps(body, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('payloads',
+    sa.Column('hash', sa.String(length=64), nullable=False),
+    sa.Column('body', sa.JSON(), nullable=False),
+    sa.Column('last_written_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.PrimaryKeyConstraint('hash')
+    )
+    op.add_column('dashboard_items', sa.Column('payload_hash', sa.String(length=64), nullable=True))
+
+    # move existing bodies over in id order, one batch per round trip
+    conn = op.get_bind()
+    seen = set()
+    after = 0
+    while True:
+        rows = conn.execute(
+            sa.select(items.c.id, items.c.payload)
+            .where(items.c.id > after)
+            .order_by(items.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        after = rows[-1].id
+        hashed = [(row.id, _hash(row.payload), row.payload) for row in rows]
+        new = {h: body for _, h, body in hashed if h not in seen}
+        if new:
+            conn.execute(payloads.insert(), [{'hash': h, 'body': body} for h, body in new.items()])
+            seen.update(new)
+        conn.execute(
+            items.update().where(items.c.id == sa.bindparam('item_id')).values(payload_hash=sa.bindparam('h')),
+            [{'item_id': item_id, 'h': h} for item_id, h, _ in hashed],
+        )
+
+    with op.batch_alter_table('dashboard_items') as batch_op:
+        batch_op.alter_column('payload_hash', existing_type=sa.String(length=64), nullable=False)
+        batch_op.create_foreign_key('fk_dashboard_items_payload_hash', 'payloads', ['payload_hash'], ['hash'])
+        batch_op.create_index(batch_op.f('ix_dashboard_items_payload_hash'), ['payload_hash'], unique=False)
+        batch_op.drop_column('payload')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('dashboard_items', sa.Column('payload', sa.JSON(), nullable=True))
+    conn = op.get_bind()
+    conn.execute(
+        items.update().values(
+            payload=sa.select(payloads.c.body).where(payloads.c.hash == items.c.payload_hash).scalar_subquery()
+        )
+    )
+    with op.batch_alter_table('dashboard_items') as batch_op:
+        batch_op.alter_column('payload', existing_type=sa.JSON(), nullable=False)
+        batch_op.drop_index(batch_op.f('ix_dashboard_items_payload_hash'))
+        batch_op.drop_constraint('fk_dashboard_items_payload_hash', type_='foreignkey')
+        batch_op.drop_column('payload_hash')
+    op.drop_table('payloads')
@@ -0,0 +1,55 @@
+from datetime import date as date_type
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import get_async_db
+from deps import CurrentUser, get_current_principal
+from models import VoteRollup
+from schemas import VoteAnalyticsResponse, VoteAnalyticsRow
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+GROUP_COLUMNS = {
+    "item_type": VoteRollup.item_type,
+    "investor_type": VoteRollup.investor_type,
+    "day": VoteRollup.day,
+}
+
+
+@router.get("/votes", response_model=VoteAnalyticsResponse)
+async def vote_analytics(
+    group_by: Literal["item_type", "investor_type", "day"] = Query("item_type"),
+    start: date_type | None = Query(None, description="first dashboard day to include"),
+    end: date_type | None = Query(None, description="last dashboard day to include"),
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Up/down votes and approval rate per item type, investor type or dashboard day.
+    Reads only the vote_rollups counters (see vote_rollups.py), never the votes table.
+    """
+    column = GROUP_COLUMNS[group_by]
+    stmt = select(column, func.sum(VoteRollup.up), func.sum(VoteRollup.down)).group_by(column).order_by(column)
+    if start is not None:
+        stmt = stmt.where(VoteRollup.day >= start)
+    if end is not None:
+        stmt = stmt.where(VoteRollup.day <= end)
+
+    rows = []
+    for key, up, down in await db.execute(stmt):
+        total = up + down
+        if not total:
+            continue  # bucket emptied by flips / preference changes
+        rows.append(
+            VoteAnalyticsRow(
+                key=str(key),
+                up=up,
+                down=down,
+                total=total,
+                approval_rate=round(up / total, 4) if total else None,
+            )
+        )
+    return VoteAnalyticsResponse(group_by=group_by, rows=rows)
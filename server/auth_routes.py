@@ -1,48 +1,89 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from db import get_db
+from db import get_async_db
 from models import User
 from schemas import SignupRequest, AuthResponse, LoginRequest
-from auth_utils import hash_password, create_access_token
+from auth_utils import hash_password_async, create_access_token
 
-from auth_utils import verify_password
+from auth_utils import HashingBusy, verify_and_update_password_async
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+def _hashing_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-in attempts right now, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/signup", response_model=AuthResponse, status_code=status.HTTP_201_CREATED)
-def signup(payload: SignupRequest, db: Session = Depends(get_db)):
+async def signup(payload: SignupRequest, db: AsyncSession = Depends(get_async_db)):
     # Check if email already exists
-    existing = db.query(User).filter(User.email == payload.email).first()
+    existing = (await db.execute(select(User.id).where(User.email == payload.email))).first()
     if existing:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Email already registered",
         )
+    # don't hold a pooled DB connection while hashing
+    await db.rollback()
+
+    try:
+        password_hash = await hash_password_async(payload.password)
+    except HashingBusy:
+        raise _hashing_busy()
 
     user = User(
         email=payload.email,
         name=payload.name,
-        password_hash=hash_password(payload.password),
+        password_hash=password_hash,
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # same email registered concurrently
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Email already registered",
+        )
 
     token = create_access_token(str(user.id))
     return AuthResponse(access_token=token)
 
 
 @router.post("/login", response_model=AuthResponse)
-def login(payload: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == payload.email).first()
-    if not user or not verify_password(payload.password, user.password_hash):
+async def login(payload: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    user = (
+        await db.execute(select(User.id, User.password_hash).where(User.email == payload.email))
+    ).first()
+    # don't hold a pooled DB connection while hashing
+    await db.rollback()
+
+    valid, new_hash = False, None
+    if user:
+        try:
+            valid, new_hash = await verify_and_update_password_async(payload.password, user.password_hash)
+        except HashingBusy:
+            raise _hashing_busy()
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
         )
 
+    # cost parameters changed since this hash was made: store the upgraded hash
+    if new_hash:
+        await db.execute(update(User).where(User.id == user.id).values(password_hash=new_hash))
+        await db.commit()
+
     token = create_access_token(str(user.id))
     return AuthResponse(access_token=token)
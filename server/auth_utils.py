@@ -1,23 +1,103 @@
+import asyncio
 import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 
-from dotenv import load_dotenv
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 
-load_dotenv()
+import config  # noqa: F401
 
 # --- Password hashing ---
-# pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Argon2 cost parameters; unset values keep passlib's defaults. Changing them makes
+# existing hashes "need update", and they are rehashed transparently on next login.
+_ARGON2_PARAMS = {
+    "argon2__time_cost": os.getenv("ARGON2_TIME_COST"),
+    "argon2__memory_cost": os.getenv("ARGON2_MEMORY_COST"),  # KiB
+    "argon2__parallelism": os.getenv("ARGON2_PARALLELISM"),
+}
+
+# Built on first use: passlib and the argon2 backend are only needed by signup/login,
+# so they stay out of the import path of every worker.
+_pwd_context = None
+
+
+def get_pwd_context():
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+
+        # _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        _pwd_context = CryptContext(
+            schemes=["argon2"],
+            deprecated="auto",
+            **{k: int(v) for k, v in _ARGON2_PARAMS.items() if v},
+        )
+    return _pwd_context
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Returns (valid, new_hash); new_hash is set when the stored hash uses outdated parameters."""
+    return get_pwd_context().verify_and_update(plain_password, hashed_password)
+
+
+# --- Hashing executor ---
+# Argon2 is deliberately slow, so it runs on a dedicated, size-limited pool instead of
+# the shared default thread pool. "process" spreads the work across cores.
+# Once PASSWORD_HASH_MAX_PENDING jobs are queued or running, new ones fail fast.
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")  # thread | process
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+_hash_executor: Executor | None = None
+_hash_pending = 0
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full; routes answer 503."""
+
+
+def _get_hash_executor() -> Executor:
+    global _hash_executor
+    if _hash_executor is None:
+        if PASSWORD_HASH_EXECUTOR == "process":
+            _hash_executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+        else:
+            _hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="argon2")
+    return _hash_executor
+
+
+async def _run_hashing(fn, *args):
+    global _hash_pending
+    if _hash_pending >= PASSWORD_HASH_MAX_PENDING:
+        raise HashingBusy()
+    _hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_hash_executor(), fn, *args)
+    finally:
+        _hash_pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hashing(hash_password, password)
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return await _run_hashing(verify_and_update_password, plain_password, hashed_password)
+
+
+def shutdown_hash_executor() -> None:
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
 
 
 # --- JWT config ---
@@ -41,12 +121,19 @@ def create_access_token(subject: str) -> str:
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
 
+def decode_access_token_claims(token: str) -> dict:
+    """
+    Returns all claims (sub, exp) if valid, raises if invalid.
+    """
+    return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+
+
 def decode_access_token(token: str) -> str:
     """
     Returns subject (user id) if valid, raises if invalid.
     """
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = decode_access_token_claims(token)
         return payload["sub"]
     except JWTError:
         raise
@@ -0,0 +1,34 @@
+"""Shared helpers for the benchmark scripts (run them from the server/ directory)."""
+import os
+import statistics
+import tempfile
+
+
+def bootstrap_env(extra: dict | None = None) -> None:
+    """
+    Make the app importable without a real .env: throwaway SQLite DB + dummy JWT secret.
+    Must run before importing any server module.
+    """
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+    os.environ.setdefault("JWT_SECRET", "bench-secret")
+    for k, v in (extra or {}).items():
+        os.environ[k] = v
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def report(label: str, samples: list[float], unit: str = "ms") -> None:
+    scale = 1000 if unit == "ms" else 1
+    print(
+        f"{label:<28} n={len(samples):<5} "
+        f"p50={percentile(samples, 50) * scale:8.1f}{unit} "
+        f"p99={percentile(samples, 99) * scale:8.1f}{unit} "
+        f"mean={statistics.fmean(samples) * scale if samples else 0:8.1f}{unit}"
+    )
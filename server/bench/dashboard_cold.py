@@ -0,0 +1,65 @@
+"""
+Cold dashboard load: time to produce all four item payloads against local stub upstreams.
+
+    python -m bench.dashboard_cold [--runs 30]
+
+Compares the old sequential awaits with the concurrent `fetch_payloads` path.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from bench.common import bootstrap_env, report
+from bench.stub_upstreams import start_stubs, stub_env
+
+
+async def main(runs: int) -> None:
+    servers = await start_stubs()
+    bootstrap_env(stub_env(servers))
+
+    # imported late so the integrations pick up the stub base URLs
+    from dashboard_routes import ITEM_TYPES, fetch_item_payload, fetch_payloads
+    from integrations import coingecko, cryptopanic, hf_ai, reddit_memes
+    from integrations.http_clients import close_clients, connection_stats
+
+    async def reset_caches():
+        await coingecko._PRICE_CACHE.clear()
+        await cryptopanic._NEWS_CACHE.clear()
+        await hf_ai._INSIGHT_CACHE.clear()
+        await reddit_memes._CACHE.clear()
+
+    assets = ["BTC", "ETH"]
+    sequential, concurrent = [], []
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(runs):
+            await reset_caches()
+            t0 = time.perf_counter()
+            for t in ITEM_TYPES:
+                await fetch_item_payload(t, assets, None)
+            sequential.append(time.perf_counter() - t0)
+
+            await reset_caches()
+            t0 = time.perf_counter()
+            await fetch_payloads(ITEM_TYPES, assets, None)
+            concurrent.append(time.perf_counter() - t0)
+
+    report("cold load (sequential)", sequential)
+    report("cold load (concurrent)", concurrent)
+    for provider, stats in connection_stats().items():
+        print(f"  {provider:<12} requests={stats['requests']:<4} new_connections={stats['new_connections']}")
+
+    await close_clients()
+    await asyncio.sleep(0)  # let the stub servers see the connections close
+
+    for s in servers.values():
+        await s.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(main(args.runs))
@@ -0,0 +1,170 @@
+"""
+GET /dashboard/history query cost over a large synthetic dashboard_items table.
+
+    python -m bench.history [--users 5000] [--days 100] [--samples 200] [--page-days 14]
+
+Seeds users x days x 4 items (2M rows by default; ~10% of items voted) into a temp
+SQLite DB, then walks every page for a sample of users with the keyset cursor
+(history_query) and times the same statement paged with OFFSET. The walk is then
+repeated on the previous index set (unique (user_id, date, item_type) plus single-column
+indexes). Query plans are printed so the index use is visible.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import time
+from datetime import date, timedelta
+
+from bench.common import bootstrap_env, report
+
+ITEM_TYPES = ("news", "prices", "ai", "meme")
+
+
+def seed(db_path: str, n_users: int, n_days: int) -> int:
+    from db import Base, engine
+    import models  # noqa: F401
+
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.executemany(
+        "INSERT INTO users (id, email, name, password_hash, created_at) VALUES (?, ?, ?, 'x', CURRENT_TIMESTAMP)",
+        ((u, f"hist{u}@example.com", f"hist{u}") for u in range(1, n_users + 1)),
+    )
+    from payload_store import payload_hash
+
+    body = {"stub": True, "text": "x" * 200}
+    payload = payload_hash(body)
+    conn.execute("INSERT INTO payloads (hash, body, last_written_at) VALUES (?, ?, CURRENT_TIMESTAMP)",
+                 (payload, json.dumps(body)))
+    today = date.today()
+    item_id = 0
+    votes = []
+
+    def items():
+        nonlocal item_id
+        # day-major, like real traffic: every user's rows for a day are interleaved
+        for d in range(n_days, 0, -1):
+            day = (today - timedelta(days=d)).isoformat()
+            for u in range(1, n_users + 1):
+                for t in ITEM_TYPES:
+                    item_id += 1
+                    if random.random() < 0.1:
+                        votes.append((u, item_id, random.choice((1, -1))))
+                    yield item_id, u, day, t, payload
+
+    conn.executemany(
+        "INSERT INTO dashboard_items (id, user_id, date, item_type, payload_hash, created_at) "
+        "VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)",
+        items(),
+    )
+    conn.executemany(
+        "INSERT INTO votes (user_id, dashboard_item_id, value, created_at) VALUES (?, ?, ?, CURRENT_TIMESTAMP)",
+        votes,
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    return item_id
+
+
+async def run(n_users: int, n_days: int, samples: int, page_days: int) -> None:
+    bootstrap_env()
+    db_path = os.environ["DATABASE_URL"].removeprefix("sqlite:///")
+
+    t0 = time.perf_counter()
+    rows = seed(db_path, n_users, n_days)
+    print(f"seeded {rows:,} dashboard_items for {n_users:,} users x {n_days} days in {time.perf_counter() - t0:.1f}s")
+
+    from sqlalchemy import and_, select
+
+    from dashboard_routes import history_query
+    from db import AsyncSessionLocal, async_engine
+    from models import DashboardItem, Vote
+
+    today = date.today()
+    users = random.sample(range(1, n_users + 1), min(samples, n_users))
+
+    def show_plan(label: str) -> None:
+        sql = str(history_query(users[0], None, today, today - timedelta(days=n_days // 2), page_days)
+                  .compile(compile_kwargs={"literal_binds": True}))
+        conn = sqlite3.connect(db_path)
+        print(f"query plan ({label}):")
+        for row in conn.execute("EXPLAIN QUERY PLAN " + sql):
+            print("   ", row[-1])
+        conn.close()
+
+    def offset_query(user_id: int, page_no: int):
+        # history_query with the page of dates found by OFFSET instead of the cursor
+        page = (
+            select(DashboardItem.date)
+            .where(DashboardItem.user_id == user_id, DashboardItem.date <= today)
+            .distinct()
+            .order_by(DashboardItem.date.desc())
+            .limit(page_days + 1)
+            .offset(page_no * page_days)
+            .subquery()
+        )
+        return (
+            select(DashboardItem, Vote.value)
+            .join(page, DashboardItem.date == page.c.date)
+            .outerjoin(Vote, and_(Vote.dashboard_item_id == DashboardItem.id, Vote.user_id == user_id))
+            .where(DashboardItem.user_id == user_id)
+            .order_by(DashboardItem.date.desc(), DashboardItem.id)
+        )
+
+    async def walk(db, label: str) -> None:
+        first, later, offset_first, offset_later = [], [], [], []
+        for user_id in users:
+            before, page_no = None, 0
+            while True:
+                t = time.perf_counter()
+                rows = (await db.execute(history_query(user_id, None, today, before, page_days))).all()
+                (later if page_no else first).append(time.perf_counter() - t)
+                days = list(dict.fromkeys(item.date for item, _ in rows))
+                before = days[page_days - 1] if len(days) > page_days else None
+                t = time.perf_counter()
+                (await db.execute(offset_query(user_id, page_no))).all()
+                (offset_later if page_no else offset_first).append(time.perf_counter() - t)
+                page_no += 1
+                if before is None:
+                    break
+        report(f"first page keyset {label}", first)
+        report(f"later pages keyset {label}", later)
+        report(f"later pages OFFSET {label}", offset_later)
+
+    show_plan("new index")
+    async with AsyncSessionLocal() as db:
+        await walk(db, "(new)")
+
+    # the same walk on the previous schema: uq (user_id, date, item_type) + single-column indexes
+    conn = sqlite3.connect(db_path)
+    conn.execute("DROP INDEX ix_dashboard_items_user_date")
+    conn.execute("CREATE INDEX ix_dashboard_items_user_id ON dashboard_items (user_id)")
+    conn.execute("ANALYZE")
+    conn.close()
+    await async_engine.dispose()
+    show_plan("previous indexes")
+    async with AsyncSessionLocal() as db:
+        await walk(db, "(old)")
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=100)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--page-days", type=int, default=14)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.days, args.samples, args.page_days))
+
+
+if __name__ == "__main__":
+    main()
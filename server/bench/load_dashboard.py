@@ -0,0 +1,101 @@
+"""
+Concurrent load test for GET /dashboard (warm path: today's items already exist).
+
+    python -m bench.load_dashboard [--users 50] [--concurrency 50] [--requests 2000]
+
+Runs the app in-process over ASGI against a throwaway SQLite DB and stub upstreams,
+and reports dashboard throughput/latency plus /health latency while under load.
+Event-loop blocking shows up directly as /health tail latency.
+Run it on two commits to compare.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+from datetime import date
+
+from bench.common import bootstrap_env, report
+from bench.stub_upstreams import start_stubs, stub_env
+
+
+def seed(n_users: int) -> list[str]:
+    from auth_utils import create_access_token
+    from db import Base, SessionLocal, engine
+    from models import DashboardItem, Preferences, User
+    from payload_store import store_payload_sync
+
+    Base.metadata.create_all(engine)
+    tokens = []
+    with SessionLocal() as db:
+        for n in range(n_users):
+            user = User(email=f"load{n}@example.com", name=f"load{n}", password_hash="x")
+            db.add(user)
+            db.flush()
+            db.add(Preferences(user_id=user.id, assets=["BTC", "ETH"], investor_type="HODLer", content_types=["Market News"]))
+            for t in ("news", "prices", "ai", "meme"):
+                db.add(DashboardItem(user_id=user.id, date=date.today(), item_type=t, payload_hash=store_payload_sync(db, {"seed": t})))
+            tokens.append(create_access_token(str(user.id)))
+        db.commit()
+    return tokens
+
+
+async def main(n_users: int, concurrency: int, total: int) -> None:
+    import httpx
+
+    servers = await start_stubs()
+    bootstrap_env(stub_env(servers))
+    tokens = seed(n_users)
+
+    from db import async_engine
+    from integrations.http_clients import close_clients
+    from main import app
+
+    dashboard_latencies, health_latencies = [], []
+    remaining = total
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+
+        async def worker(n: int):
+            nonlocal remaining
+            headers = {"Authorization": f"Bearer {tokens[n % len(tokens)]}"}
+            while remaining > 0:
+                remaining -= 1
+                t0 = time.perf_counter()
+                r = await client.get("/dashboard", headers=headers)
+                r.raise_for_status()
+                dashboard_latencies.append(time.perf_counter() - t0)
+
+        async def prober():
+            while not done.is_set():
+                t0 = time.perf_counter()
+                await client.get("/health")
+                health_latencies.append(time.perf_counter() - t0)
+                await asyncio.sleep(0.01)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            probe = asyncio.create_task(prober())
+            t0 = time.perf_counter()
+            await asyncio.gather(*(worker(n) for n in range(concurrency)))
+            elapsed = time.perf_counter() - t0
+            done.set()
+            await probe
+
+    print(f"throughput: {len(dashboard_latencies) / elapsed:.1f} req/s at concurrency {concurrency}")
+    report("GET /dashboard", dashboard_latencies)
+    report("GET /health under load", health_latencies)
+
+    await close_clients()
+    await async_engine.dispose()
+    for s in servers.values():
+        await s.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.concurrency, args.requests))
@@ -0,0 +1,88 @@
+"""
+Login storm: many concurrent POST /auth/login while probing a sync route.
+
+    python -m bench.login_storm [--logins 400] [--concurrency 100]
+    PASSWORD_HASH_EXECUTOR=process python -m bench.login_storm
+
+Reports login throughput/latency, how many were shed with 503, and /health latency
+(a sync route on Starlette's default thread pool) during the storm.
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+from bench.common import bootstrap_env, report
+
+PASSWORD = "storm-password"
+
+
+def seed(n_users: int) -> None:
+    from auth_utils import hash_password
+    from db import Base, SessionLocal, engine
+    from models import User
+
+    Base.metadata.create_all(engine)
+    password_hash = hash_password(PASSWORD)
+    with SessionLocal() as db:
+        db.add_all(User(email=f"storm{n}@example.com", name=f"storm{n}", password_hash=password_hash) for n in range(n_users))
+        db.commit()
+
+
+async def main(logins: int, concurrency: int) -> None:
+    import httpx
+
+    bootstrap_env()
+    seed(concurrency)
+
+    from auth_utils import PASSWORD_HASH_EXECUTOR, PASSWORD_HASH_WORKERS, shutdown_hash_executor
+    from db import async_engine
+    from main import app
+
+    statuses = Counter()
+    login_latencies, health_latencies = [], []
+    remaining = logins
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as http:
+
+        async def worker(n: int):
+            nonlocal remaining
+            body = {"email": f"storm{n}@example.com", "password": PASSWORD}
+            while remaining > 0:
+                remaining -= 1
+                t0 = time.perf_counter()
+                r = await http.post("/auth/login", json=body)
+                login_latencies.append(time.perf_counter() - t0)
+                statuses[r.status_code] += 1
+
+        async def prober():
+            while not done.is_set():
+                t0 = time.perf_counter()
+                await http.get("/health")
+                health_latencies.append(time.perf_counter() - t0)
+                await asyncio.sleep(0.02)
+
+        probe = asyncio.create_task(prober())
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+        done.set()
+        await probe
+
+    print(f"executor={PASSWORD_HASH_EXECUTOR} workers={PASSWORD_HASH_WORKERS}: "
+          f"{statuses[200] / elapsed:.1f} successful logins/s over {elapsed:.1f}s")
+    report("POST /auth/login", login_latencies)
+    report("GET /health during storm", health_latencies)
+    print("status codes:", dict(statuses))
+
+    shutdown_hash_executor()
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.concurrency))
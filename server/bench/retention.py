@@ -0,0 +1,115 @@
+"""
+Retention throughput: archiving expired dashboard_items/votes while the app keeps writing.
+
+    python -m bench.retention [--users 2000] [--days 120] [--keep-days 30] [--batch-size 1000] [--pause 0]
+
+Seeds the same synthetic history as bench.history, then runs archive_expired() for
+everything older than --keep-days. Meanwhile a writer flips votes on live items, the
+way POST /votes does, and its latency is compared with an idle baseline (long write
+transactions would show up there first on SQLite). Finally times archived history
+reads (read_archived_days) and prints the archive size.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import time
+from datetime import date
+
+from bench.common import bootstrap_env, report
+
+
+async def run(n_users: int, n_days: int, keep_days: int, batch_size: int, pause: float, samples: int) -> None:
+    bootstrap_env({"ARCHIVE_DIR": os.path.join(os.environ.get("TMPDIR", "/tmp"), f"bench-archive-{os.getpid()}")})
+    db_path = os.environ["DATABASE_URL"].removeprefix("sqlite:///")
+
+    from bench.history import seed
+
+    t0 = time.perf_counter()
+    rows = seed(db_path, n_users, n_days)
+    print(f"seeded {rows:,} dashboard_items for {n_users:,} users x {n_days} days in {time.perf_counter() - t0:.1f}s")
+
+    from sqlalchemy import select, update
+
+    import retention
+    from db import AsyncSessionLocal, async_engine
+    from models import DashboardItem, Vote
+
+    cutoff = retention.retention_cutoff(keep_days)
+    async with AsyncSessionLocal() as db:
+        live_votes = (
+            await db.execute(
+                select(Vote.id).join(DashboardItem, Vote.dashboard_item_id == DashboardItem.id)
+                .where(DashboardItem.date >= cutoff)
+            )
+        ).scalars().all()
+
+    async def writer(stop: asyncio.Event, samples: list[float]) -> None:
+        async with AsyncSessionLocal() as db:
+            while not stop.is_set():
+                t = time.perf_counter()
+                await db.execute(update(Vote).where(Vote.id == random.choice(live_votes)).values(value=-Vote.value))
+                await db.commit()
+                samples.append(time.perf_counter() - t)
+                await asyncio.sleep(0.005)
+
+    async def timed_writer(seconds: float) -> list[float]:
+        stop, samples = asyncio.Event(), []
+        task = asyncio.create_task(writer(stop, samples))
+        await asyncio.sleep(seconds)
+        stop.set()
+        await task
+        return samples
+
+    baseline = await timed_writer(2.0)
+
+    stop, during = asyncio.Event(), []
+    task = asyncio.create_task(writer(stop, during))
+    t0 = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        stats = await retention.archive_expired(db, cutoff, batch_size, pause)
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await task
+
+    print(
+        f"archived {stats['items']:,} items + {stats['votes']:,} votes in {stats['batches']} batches "
+        f"of {batch_size}: {elapsed:.1f}s ({stats['items'] / elapsed:,.0f} items/s)"
+    )
+    report("vote write, idle", baseline)
+    report("vote write, archiving", during)
+
+    archive_bytes = sum(
+        os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(retention.ARCHIVE_DIR) for f in files
+    )
+    print(f"archive: {archive_bytes / 1e6:.1f} MB ({archive_bytes / max(stats['items'], 1):.0f} bytes/item)")
+    conn = sqlite3.connect(db_path)
+    left = conn.execute("SELECT COUNT(*) FROM dashboard_items").fetchone()[0]
+    conn.close()
+    print(f"dashboard_items left in the database: {left:,}")
+
+    users = random.sample(range(1, n_users + 1), min(samples, n_users))
+    reads = []
+    for user_id in users:
+        t = time.perf_counter()
+        await asyncio.to_thread(retention.read_archived_days, user_id, None, date.today(), cutoff, 14)
+        reads.append(time.perf_counter() - t)
+    report("archived page (14 days)", reads)
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=120)
+    parser.add_argument("--keep-days", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--pause", type=float, default=0.0)
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.days, args.keep_days, args.batch_size, args.pause, args.samples))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Worker boot time: fresh interpreter -> `import main` -> lifespan startup complete.
+
+    python -m bench.startup [--runs 10]
+
+Each run is a separate subprocess (like a new uvicorn worker). The DB is a throwaway
+SQLite file stamped at the alembic head, so the boot-time schema check passes.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from bench.common import bootstrap_env, report
+
+WORKER = r"""
+import asyncio, json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+
+async def boot():
+    async with main.app.router.lifespan_context(main.app):
+        t2 = time.perf_counter()
+    return t2
+
+t2 = asyncio.run(boot())
+print(json.dumps({"import": t1 - t0, "lifespan": t2 - t1, "total": t2 - t0}))
+"""
+
+
+def prepare_db() -> None:
+    from alembic import command
+
+    import models  # noqa: F401
+    from db import Base, engine
+    from migrate import alembic_config
+
+    Base.metadata.create_all(engine)
+    command.stamp(alembic_config(), "head")
+
+
+def main(runs: int) -> None:
+    bootstrap_env()
+    prepare_db()
+
+    server_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    samples = {"import": [], "lifespan": [], "total": []}
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", WORKER],
+            cwd=server_dir,
+            env=os.environ.copy(),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        timings = json.loads(out.stdout.strip().splitlines()[-1])
+        for k, v in timings.items():
+            samples[k].append(v)
+
+    report("import main", samples["import"])
+    report("lifespan startup", samples["lifespan"])
+    report("worker boot (total)", samples["total"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    main(args.runs)
@@ -0,0 +1,157 @@
+"""
+Local stub servers for the upstream providers (CoinGecko, CryptoPanic, HF router, Reddit).
+
+Each provider gets its own asyncio HTTP/1.1 server on 127.0.0.1 with a configurable
+latency, so benchmarks can exercise the real integration code without network access.
+"""
+import asyncio
+import json
+import random
+from urllib.parse import urlsplit
+
+# Default simulated latency per provider (seconds): (base, jitter)
+DEFAULT_LATENCY = {
+    "coingecko": (0.15, 0.05),
+    "cryptopanic": (0.25, 0.10),
+    "hf": (1.50, 0.50),
+    "reddit": (0.30, 0.10),
+}
+
+
+def _prices_body(query: str) -> dict:
+    ids = []
+    for part in query.split("&"):
+        if part.startswith("ids="):
+            ids = part[4:].replace("%2C", ",").split(",")
+    return {cid: {"usd": round(random.uniform(1, 100_000), 2)} for cid in ids if cid}
+
+
+def _news_body() -> dict:
+    return {
+        "results": [
+            {
+                "id": 1,
+                "slug": "stub-story",
+                "title": "Stub headline",
+                "source": {"domain": "stub.local"},
+                "published_at": "2026-01-01T00:00:00Z",
+            }
+        ]
+    }
+
+
+def _ai_body() -> dict:
+    return {"choices": [{"message": {"content": "Stub insight. Size positions sensibly."}}]}
+
+
+def _reddit_body(path: str) -> dict:
+    sub = path.split("/")[2] if path.count("/") >= 2 else "stub"
+    children = [
+        {
+            "data": {
+                "title": f"Stub meme {n}",
+                "permalink": f"/r/{sub}/comments/{n}/",
+                "url": f"https://i.stub.local/{sub}/{n}.png",
+                "subreddit": sub,
+            }
+        }
+        for n in range(20)
+    ]
+    return {"data": {"children": children}}
+
+
+def _route(provider: str, path: str, query: str) -> dict:
+    if provider == "coingecko":
+        return _prices_body(query)
+    if provider == "cryptopanic":
+        return _news_body()
+    if provider == "hf":
+        return _ai_body()
+    if provider == "reddit":
+        return _reddit_body(path)
+    return {}
+
+
+class StubServer:
+    def __init__(self, provider: str, latency: tuple[float, float] | None = None):
+        self.provider = provider
+        self.latency = latency or DEFAULT_LATENCY[provider]
+        self.requests = 0
+        self.connections = 0
+        self._server = None
+        self.port = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                _, target, _ = request_line.decode("latin-1").split(" ", 2)
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value.strip())
+                if length:
+                    await reader.readexactly(length)
+
+                self.requests += 1
+                base, jitter = self.latency
+                await asyncio.sleep(max(0.0, base + random.uniform(-jitter, jitter)))
+
+                parts = urlsplit(target)
+                body = json.dumps(_route(self.provider, parts.path, parts.query)).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: application/json\r\n"
+                    + f"Content-Length: {len(body)}\r\n".encode()
+                    + b"Connection: keep-alive\r\n\r\n"
+                    + body
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def start_stubs(latency: dict | None = None) -> dict[str, StubServer]:
+    latency = latency or {}
+    servers = {}
+    for provider in DEFAULT_LATENCY:
+        servers[provider] = await StubServer(provider, latency.get(provider)).start()
+    return servers
+
+
+def stub_env(servers: dict[str, StubServer]) -> dict[str, str]:
+    """Environment variables that point the integrations at the stub servers."""
+    return {
+        "COINGECKO_BASE_URL": servers["coingecko"].base_url,
+        "CRYPTOPANIC_BASE_URL": servers["cryptopanic"].base_url + "/api/developer/v2/posts/",
+        "CRYPTOPANIC_API_KEY": "stub",
+        "HF_ROUTER_BASE_URL": servers["hf"].base_url + "/v1",
+        "HF_TOKEN": "stub",
+        "REDDIT_BASE_URL": servers["reddit"].base_url,
+        # the stubs have no quota; don't let the real providers' rate limits dominate the numbers
+        **{f"RATE_LIMIT_{p.upper()}_PER_SECOND": "10000" for p in ("coingecko", "cryptopanic", "huggingface", "reddit")},
+        **{f"RATE_LIMIT_{p.upper()}_BURST": "10000" for p in ("coingecko", "cryptopanic", "huggingface", "reddit")},
+    }
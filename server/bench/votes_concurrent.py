@@ -0,0 +1,105 @@
+"""
+Concurrent vote clicks against POST /votes and POST /votes/batch.
+
+    python -m bench.votes_concurrent [--users 20] [--clicks 2000] [--concurrency 50]
+
+Each simulated client hammers thumbs-up/down on its own four items, including rapid
+double-clicks on the same item, and the script reports throughput, latency and any
+non-2xx responses (a unique-constraint race would show up as 500s).
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+from datetime import date
+
+from bench.common import bootstrap_env, report
+
+
+def seed(n_users: int) -> list[tuple[str, list[int]]]:
+    from auth_utils import create_access_token
+    from db import Base, SessionLocal, engine
+    from models import DashboardItem, User
+    from payload_store import store_payload_sync
+
+    Base.metadata.create_all(engine)
+    clients = []
+    with SessionLocal() as db:
+        for n in range(n_users):
+            user = User(email=f"voter{n}@example.com", name=f"voter{n}", password_hash="x")
+            db.add(user)
+            db.flush()
+            empty = store_payload_sync(db, {})
+            items = [
+                DashboardItem(user_id=user.id, date=date.today(), item_type=t, payload_hash=empty)
+                for t in ("news", "prices", "ai", "meme")
+            ]
+            db.add_all(items)
+            db.flush()
+            clients.append((create_access_token(str(user.id)), [i.id for i in items]))
+        db.commit()
+    return clients
+
+
+async def main(n_users: int, clicks: int, concurrency: int) -> None:
+    import httpx
+
+    bootstrap_env()
+    clients = seed(n_users)
+
+    from db import async_engine
+    from main import app
+
+    statuses = Counter()
+    single, batch = [], []
+    remaining = clicks
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as http:
+
+        async def worker(n: int):
+            nonlocal remaining
+            token, item_ids = clients[n % len(clients)]
+            headers = {"Authorization": f"Bearer {token}"}
+            while remaining > 0:
+                remaining -= 1
+                item_id = random.choice(item_ids)
+                value = random.choice((-1, 1))
+                t0 = time.perf_counter()
+                # double-click: two identical requests racing on the same row
+                rs = await asyncio.gather(
+                    http.post("/votes", json={"dashboard_item_id": item_id, "value": value}, headers=headers),
+                    http.post("/votes", json={"dashboard_item_id": item_id, "value": value}, headers=headers),
+                )
+                single.append(time.perf_counter() - t0)
+                statuses.update(r.status_code for r in rs)
+
+                t0 = time.perf_counter()
+                r = await http.post(
+                    "/votes/batch",
+                    json={"votes": [{"dashboard_item_id": i, "value": random.choice((-1, 1))} for i in item_ids]},
+                    headers=headers,
+                )
+                batch.append(time.perf_counter() - t0)
+                statuses[r.status_code] += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+
+    total_votes = len(single) * 2 + len(batch) * 4
+    print(f"{total_votes / elapsed:.0f} votes/s over {elapsed:.1f}s at concurrency {concurrency}")
+    report("POST /votes (double-click)", single)
+    report("POST /votes/batch (4 votes)", batch)
+    print("status codes:", dict(statuses))
+
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--clicks", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.clicks, args.concurrency))
@@ -0,0 +1,16 @@
+"""
+Process-wide environment loading.
+
+Importing this module loads server/.env exactly once (existing environment
+variables win). Every module that reads settings via os.getenv at import time
+imports it first, so import order between modules doesn't matter.
+"""
+import os
+
+from dotenv import load_dotenv
+
+ENV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+
+load_dotenv(ENV_FILE)
+
+APP_ENV = os.getenv("APP_ENV", "development")
@@ -1,21 +1,40 @@
-from datetime import date as date_type
+import asyncio
+import base64
+import json
+from datetime import date as date_type, timedelta
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from db import get_db
-from deps import get_current_user
+from db import AsyncSessionLocal, get_async_db
+from etags import if_none_match, make_etag, not_modified, set_etag
+from deps import CurrentUser, get_current_principal
 from models import DashboardItem, Vote, User, Preferences
-from schemas import DashboardResponse, DashboardItemResponse
+from schemas import DashboardResponse, DashboardItemResponse, DashboardHistoryResponse
 from integrations.coingecko import fetch_prices_usd
 from integrations.cryptopanic import fetch_market_news
 from integrations.hf_ai import fetch_ai_insight
-from integrations.reddit_memes import get_random_meme
+from integrations.reddit_memes import cached_meme, get_random_meme
+from metrics import stage
+from payload_store import attach_payloads, payload_hash, store_payloads
+from retention import read_archived_days
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
 ITEM_TYPES = ["news", "prices", "ai", "meme"]
 
+# Per-integration deadlines (seconds). A provider that misses its deadline gets a
+# degraded stub payload instead of holding up the rest of the dashboard.
+FETCH_DEADLINES = {
+    "prices": 8.0,
+    "news": 8.0,
+    "ai": 20.0,
+    "meme": 8.0,
+}
+
 
 def build_stub_payload(item_type: str):
     if item_type == "news":
@@ -42,103 +61,453 @@ def build_stub_payload(item_type: str):
     return {"note": "unknown type"}
 
 
+def build_fallback_payload(item_type: str, reason: str) -> dict:
+    """
+    Payload used when an integration fails or misses its deadline.
+    Marked as degraded so the next dashboard load retries the fetch.
+    """
+    payload = dict(build_stub_payload(item_type))
+    if item_type == "news":
+        payload.update({"title": "Crypto news unavailable", "summary": "News provider did not respond in time."})
+    elif item_type == "prices":
+        payload = {"note": "Prices unavailable right now.", "prices_usd": {}}
+    elif item_type == "ai":
+        payload = {"text": "AI insight unavailable right now."}
+    elif item_type == "meme":
+        payload["title"] = "Meme unavailable right now."
+        payload["source"] = "fallback"
+    payload["degraded"] = True
+    payload["error"] = reason
+    return payload
+
+
+def is_degraded(payload) -> bool:
+    """
+    Payloads that are retried on the next load instead of kept for the day: fallbacks,
+    anything carrying an "error", and stale (a provider's last good value served while
+    it's down).
+    """
+    return isinstance(payload, dict) and bool(
+        payload.get("degraded") or payload.get("error") or payload.get("stale")
+    )
+
+
+async def fetch_item_payload(item_type: str, assets: list[str], prefs, view_key: str | None = None) -> dict:
+    """
+    One item's payload from its integration. Integrations raise on provider failures
+    (or return their last good value marked stale); _fetch_with_deadline turns errors
+    and timeouts into degraded fallbacks.
+    """
+    if item_type == "prices":
+        return await fetch_prices_usd(assets)
+    if item_type == "news":
+        return await fetch_market_news(assets)
+    if item_type == "ai":
+        return await fetch_ai_insight({
+            "assets": assets,
+            "investor_type": prefs.investor_type if prefs else "crypto investor",
+            "content_types": prefs.content_types if prefs else [],
+        })
+    if item_type == "meme":
+        return await get_random_meme(view_key)
+    return build_stub_payload(item_type)
+
+
+async def _fetch_with_deadline(item_type: str, assets: list[str], prefs, view_key: str | None = None) -> dict:
+    try:
+        # includes integration cache hits, so the fetch.* stages show the effective cost per item
+        with stage(f"fetch.{item_type}"):
+            return await asyncio.wait_for(
+                fetch_item_payload(item_type, assets, prefs, view_key),
+                timeout=FETCH_DEADLINES.get(item_type, 10.0),
+            )
+    except asyncio.TimeoutError:
+        return build_fallback_payload(item_type, "timeout")
+    except Exception as e:
+        return build_fallback_payload(item_type, str(e)[:200] or e.__class__.__name__)
+
+
+async def fetch_payloads(item_types: list[str], assets: list[str], prefs) -> dict[str, dict]:
+    """
+    Fetch payloads for the given item types concurrently.
+    Each integration has its own deadline; failures become degraded fallbacks,
+    so the result always has one payload per requested type.
+    """
+    results = await asyncio.gather(
+        *(_fetch_with_deadline(t, assets, prefs) for t in item_types)
+    )
+    return dict(zip(item_types, results))
+
+
+def meme_view_key(user_id: int, day: date_type) -> str:
+    return f"{user_id}:{day.isoformat()}"
+
+
+async def cached_meme_for_view(meme_item: DashboardItem, user_vote, view_key: str) -> dict | None:
+    """meme_for_view() without a Reddit call: the meme it returns right now, or None if the pool needs a fetch."""
+    if user_vote is not None:
+        return meme_item.payload
+    payload = await cached_meme(view_key)
+    if payload is None:
+        return None
+    return payload if payload.get("image_url") else meme_item.payload
+
+
+async def meme_for_view(meme_item: DashboardItem, user_vote, view_key: str) -> dict:
+    """
+    Meme shown on this load: picked from the shared pool per user and day, so it changes
+    whenever the pool is refreshed, without touching the DB row (its ID stays stable for
+    voting). Being fixed for a given pool keeps the dashboard ETag stable between polls.
+    Once the user has voted, the row holds the meme they voted on, so that one is shown.
+    Falls back to the stored daily snapshot if the pool can't be refreshed in time.
+    """
+    payload = await cached_meme_for_view(meme_item, user_vote, view_key)
+    if payload is not None:
+        return payload
+    payload = await _fetch_with_deadline("meme", [], None, view_key)
+    if is_degraded(payload) or not payload.get("image_url"):
+        return meme_item.payload
+    return payload
+
+
+def dashboard_state_query(user_id: int, day: date_type):
+    """
+    Preferences, the day's items and the user's vote on each, as one statement.
+    Anchored on users so the user's row (and preferences) come back even with no items yet.
+    """
+    return (
+        select(Preferences, DashboardItem, Vote.value)
+        .select_from(User)
+        .outerjoin(Preferences, Preferences.user_id == User.id)
+        .outerjoin(DashboardItem, and_(DashboardItem.user_id == User.id, DashboardItem.date == day))
+        .outerjoin(Vote, and_(Vote.dashboard_item_id == DashboardItem.id, Vote.user_id == User.id))
+        .where(User.id == user_id)
+    )
+
+
+async def load_dashboard_state(db: AsyncSession, user_id: int, day: date_type):
+    rows = (await db.execute(dashboard_state_query(user_id, day))).all()
+    prefs = rows[0][0] if rows else None
+    items_by_type = {}
+    votes_map = {}
+    for _, item, vote_value in rows:
+        if item is None:
+            continue
+        items_by_type[item.item_type] = item
+        if vote_value is not None:
+            votes_map[item.id] = vote_value
+    # bodies come from the in-memory payload cache; a query only for ones not seen yet
+    await attach_payloads(db, items_by_type.values())
+    return prefs, items_by_type, votes_map
+
+
+def stage_payload(db: AsyncSession, items_by_type: dict, user_id: int, day: date_type, item_type: str, payload: dict) -> bool:
+    """
+    Add a new item for `item_type`, or replace a degraded one with a healthy payload.
+    The payload must already be stored (store_payloads), since the item references it.
+    Returns True if anything needs committing.
+    """
+    existing = items_by_type.get(item_type)
+    if existing is not None:
+        # retry of a degraded item: don't replace it with another fallback (stale data
+        # is still better than a placeholder, and is retried again on the next load)
+        if is_degraded(payload) and not payload.get("stale"):
+            return False
+        existing.payload_hash = payload_hash(payload)
+        existing.payload = payload
+        db.add(existing)
+        return True
+
+    items_by_type[item_type] = DashboardItem(
+        user_id=user_id,
+        date=day,
+        item_type=item_type,
+        payload_hash=payload_hash(payload),
+        payload=payload,
+    )
+    db.add(items_by_type[item_type])
+    return True
+
+
+def dashboard_etag(user_id: int, day: date_type, prefs, items_by_type: dict, votes_map: dict, meme: dict | None) -> str:
+    """
+    Strong ETag of a GET /dashboard body, from what it's built of: preferences version,
+    the day's item IDs and content hashes, the user's votes and the meme shown.
+    """
+    items = [
+        (t, i.id, i.payload_hash, votes_map.get(i.id))
+        for t, i in sorted(items_by_type.items())
+    ]
+    meme_hash = payload_hash(meme) if meme is not None else None
+    return make_etag("dashboard", user_id, day, prefs.updated_at if prefs else None, items, meme_hash)
+
+
+def items_to_fetch(items_by_type: dict) -> list[str]:
+    # meme rows are never re-fetched: the per-view meme comes from the pool
+    return [
+        t for t in ITEM_TYPES
+        if t not in items_by_type or (t != "meme" and is_degraded(items_by_type[t].payload))
+    ]
+
+
 @router.get("", response_model=DashboardResponse)
 async def get_dashboard(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
     today = date_type.today()
+    view_key = meme_view_key(current_user.id, today)
 
-    # Fetch existing items for today
-    items = (
-        db.query(DashboardItem)
-        .filter(DashboardItem.user_id == current_user.id, DashboardItem.date == today)
-        .all()
-    )
+    # One round trip: preferences + today's items + this user's votes on them
+    with stage("dashboard.load"):
+        prefs, items_by_type, votes_map = await load_dashboard_state(db, current_user.id, today)
+    user_assets = (prefs.assets if prefs and prefs.assets else ["BTC", "ETH"])
 
-    existing_types = {i.item_type for i in items}
-    created_any = False
+    # Ensure all 4 dashboard items exist for today (meme included for stable ID / voting).
+    # Missing or degraded items are fetched concurrently.
+    to_fetch = items_to_fetch(items_by_type)
 
-    # Load user preferences once (for prices/news/ai)
-    prefs = (
-        db.query(Preferences)
-        .filter(Preferences.user_id == current_user.id)
-        .first()
-    )
-    user_assets = (prefs.assets if prefs and prefs.assets else ["BTC", "ETH"])
+    # Revalidation: nothing to fetch and the meme pool cached -> 304 before any
+    # integration call or serialization
+    if not to_fetch and request.headers.get("if-none-match"):
+        meme_item = items_by_type["meme"]
+        meme = await cached_meme_for_view(meme_item, votes_map.get(meme_item.id), view_key)
+        if meme is not None:
+            etag = dashboard_etag(current_user.id, today, prefs, items_by_type, votes_map, meme)
+            if if_none_match(request, etag):
+                return not_modified(etag)
+    with stage("dashboard.fetch"):
+        payloads = await fetch_payloads(to_fetch, user_assets, prefs) if to_fetch else {}
+    if payloads:
+        # one upsert for all new bodies, before the items that reference them are flushed
+        await store_payloads(db, payloads.values())
 
-    # Ensure all 4 dashboard items exist for today (meme included for stable ID / voting)
-    for t in ITEM_TYPES:
-        if t in existing_types:
-            continue
+    changed = False
+    for t, payload in payloads.items():
+        changed |= stage_payload(db, items_by_type, current_user.id, today, t, payload)
 
-        if t == "prices":
-            payload = await fetch_prices_usd(user_assets)
-        elif t == "news":
-            payload = await fetch_market_news(user_assets)
-        elif t == "ai":
-            payload = await fetch_ai_insight({
-                "assets": user_assets,
-                "investor_type": prefs.investor_type if prefs else "crypto investor",
-                "content_types": prefs.content_types if prefs else [],
-            })
-        elif t == "meme":
-            # create an initial meme payload; it will be refreshed below every request
-            payload = await get_random_meme()
-        else:
-            payload = build_stub_payload(t)
+    if changed:
+        try:
+            # new rows get their IDs on flush; no re-select needed (expire_on_commit=False)
+            with stage("dashboard.commit"):
+                await db.commit()
+        except IntegrityError:
+            # a concurrent request created today's items first; use those
+            await db.rollback()
+            prefs, items_by_type, votes_map = await load_dashboard_state(db, current_user.id, today)
 
-        db.add(
-            DashboardItem(
-                user_id=current_user.id,
-                date=today,
-                item_type=t,
+    # Stable ordering
+    response_items = []
+    meme = None
+    with stage("dashboard.build_response"):
+        for t in ITEM_TYPES:
+            i = items_by_type.get(t)
+            if not i:
+                continue
+            payload = i.payload
+            if t == "meme":
+                payload = meme = await meme_for_view(i, votes_map.get(i.id), view_key)
+            response_items.append(
+                DashboardItemResponse(
+                    id=i.id,
+                    item_type=i.item_type,
+                    payload=payload,
+                    user_vote=votes_map.get(i.id),
+                )
+            )
+
+    etag = dashboard_etag(current_user.id, today, prefs, items_by_type, votes_map, meme)
+    if if_none_match(request, etag):
+        # e.g. the meme pool needed a refresh but came back the same
+        return not_modified(etag)
+    set_etag(response, etag)
+    return DashboardResponse(date=today, items=response_items)
+
+
+def _ndjson(obj) -> bytes:
+    return (json.dumps(obj, default=str) + "\n").encode()
+
+
+async def _stream_dashboard(user_id: int):
+    today = date_type.today()
+    # own session: the request-scoped one may be closed before the body is streamed
+    async with AsyncSessionLocal() as db:
+        prefs, items_by_type, votes_map = await load_dashboard_state(db, user_id, today)
+        user_assets = (prefs.assets if prefs and prefs.assets else ["BTC", "ETH"])
+        yield _ndjson({"type": "start", "date": today.isoformat()})
+
+        def item_line(item: DashboardItem, payload) -> bytes:
+            response = DashboardItemResponse(
+                id=item.id,
+                item_type=item.item_type,
                 payload=payload,
+                user_vote=votes_map.get(item.id),
             )
-        )
-        created_any = True
-
-    if created_any:
-        db.commit()
-        items = (
-            db.query(DashboardItem)
-            .filter(DashboardItem.user_id == current_user.id, DashboardItem.date == today)
-            .all()
-        )
+            return _ndjson({"type": "item", "item": response.model_dump()})
 
-    # Refresh meme payload on EVERY dashboard load (dynamic), but keep same row/id for voting
-    meme_item = next((it for it in items if it.item_type == "meme"), None)
-    if meme_item:
-        meme_item.payload = await get_random_meme()
-        db.add(meme_item)
-        db.commit()
-        db.refresh(meme_item)
+        async def fetch(t: str):
+            return t, await _fetch_with_deadline(t, user_assets, prefs)
 
-    # Votes
-    item_ids = [i.id for i in items]
-    votes_map = {}
-    if item_ids:
-        vote_rows = (
-            db.query(Vote)
-            .filter(Vote.user_id == current_user.id, Vote.dashboard_item_id.in_(item_ids))
-            .all()
+        view_key = meme_view_key(user_id, today)
+
+        async def meme_view(item: DashboardItem):
+            return "meme", await meme_for_view(item, votes_map.get(item.id), view_key)
+
+        to_fetch = items_to_fetch(items_by_type)
+        pending = [fetch(t) for t in to_fetch]
+        if "meme" in items_by_type and "meme" not in to_fetch:
+            pending.append(meme_view(items_by_type["meme"]))
+
+        # already-cached items go out immediately
+        sent = 0
+        for t in ITEM_TYPES:
+            if t in items_by_type and t not in to_fetch and t != "meme":
+                yield item_line(items_by_type[t], items_by_type[t].payload)
+                sent += 1
+
+        # the rest as each integration completes (stored first, so the ID is real)
+        for next_done in asyncio.as_completed(pending):
+            t, payload = await next_done
+            if t in to_fetch:
+                await store_payloads(db, [payload])
+            if t in to_fetch and stage_payload(db, items_by_type, user_id, today, t, payload):
+                try:
+                    await db.commit()
+                except IntegrityError:
+                    # a concurrent request stored this item first; stream that one
+                    await db.rollback()
+                    _, items_by_type, votes_map = await load_dashboard_state(db, user_id, today)
+                    payload = items_by_type[t].payload
+            if t == "meme" and t in to_fetch:
+                # the fetched meme is only the stored snapshot; show the per-view one, as GET /dashboard does
+                payload = await meme_for_view(items_by_type[t], votes_map.get(items_by_type[t].id), view_key)
+            yield item_line(items_by_type[t], payload)
+            sent += 1
+
+        yield _ndjson({"type": "end", "count": sent})
+
+
+@router.get("/stream")
+async def stream_dashboard(current_user: CurrentUser = Depends(get_current_principal)):
+    """
+    Same items (IDs, payloads, votes) as GET /dashboard, as NDJSON lines emitted as soon
+    as each one is cached or fetched:
+      {"type": "start", "date": ...}, {"type": "item", "item": DashboardItemResponse} x4, {"type": "end", "count": n}
+    """
+    return StreamingResponse(_stream_dashboard(current_user.id), media_type="application/x-ndjson")
+
+
+HISTORY_MAX_DAYS_PER_PAGE = 60
+
+
+def encode_history_cursor(day: date_type) -> str:
+    return base64.urlsafe_b64encode(day.isoformat().encode()).decode().rstrip("=")
+
+
+def decode_history_cursor(cursor: str) -> date_type:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return date_type.fromisoformat(base64.urlsafe_b64decode(padded).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def history_query(user_id: int, start: date_type | None, end: date_type, before: date_type | None, days: int):
+    """
+    Items + this user's votes for the newest `days` + 1 dates in [start, end] older than
+    `before` (keyset: no OFFSET, so deep pages cost the same as the first). The page of
+    dates comes from the (user_id, date, id) index; the extra date tells us there's more.
+    """
+    page = select(DashboardItem.date).where(DashboardItem.user_id == user_id, DashboardItem.date <= end)
+    if start is not None:
+        page = page.where(DashboardItem.date >= start)
+    if before is not None:
+        page = page.where(DashboardItem.date < before)
+    page = page.distinct().order_by(DashboardItem.date.desc()).limit(days + 1).subquery()
+
+    return (
+        select(DashboardItem, Vote.value)
+        .join(page, DashboardItem.date == page.c.date)
+        .outerjoin(Vote, and_(Vote.dashboard_item_id == DashboardItem.id, Vote.user_id == user_id))
+        .where(DashboardItem.user_id == user_id)
+        .order_by(DashboardItem.date.desc(), DashboardItem.id)
+    )
+
+
+async def load_history_page(
+    db: AsyncSession,
+    user_id: int,
+    start: date_type | None,
+    end: date_type,
+    before: date_type | None,
+    days: int,
+    include_archived: bool = False,
+) -> tuple[list[DashboardResponse], date_type | None]:
+    rows = (await db.execute(history_query(user_id, start, end, before, days))).all()
+    await attach_payloads(db, (item for item, _ in rows))
+
+    by_day: dict[date_type, list[DashboardItemResponse]] = {}
+    for item, vote_value in rows:
+        by_day.setdefault(item.date, []).append(
+            DashboardItemResponse(id=item.id, item_type=item.item_type, payload=item.payload, user_vote=vote_value)
         )
-        votes_map = {v.dashboard_item_id: v.value for v in vote_rows}
 
-    # Stable ordering
-    items_by_type = {i.item_type: i for i in items}
-    response_items = []
-    for t in ITEM_TYPES:
-        i = items_by_type.get(t)
-        if not i:
-            continue
-        response_items.append(
-            DashboardItemResponse(
-                id=i.id,
-                item_type=i.item_type,
-                payload=i.payload,
-                user_vote=votes_map.get(i.id),
+    if include_archived and len(by_day) <= days:
+        # the live table ran out inside the range: continue with older, archived dates.
+        # Read from the oldest live date on, de-duplicated by id, in case part of it is archived
+        # (archives from before retention kept user days whole can hold half a day).
+        if by_day:
+            oldest = list(by_day)[-1]
+            archived = await asyncio.to_thread(
+                read_archived_days, user_id, start, end, oldest + timedelta(days=1), days - len(by_day) + 1
             )
-        )
+        else:
+            archived = await asyncio.to_thread(read_archived_days, user_id, start, end, before, days)
+        for day, records in archived:
+            items = by_day.setdefault(day, [])
+            live_ids = {i.id for i in items}
+            items += [
+                DashboardItemResponse(
+                    id=r["id"],
+                    item_type=r["item_type"],
+                    payload=r["payload"],
+                    user_vote=next((v["value"] for v in r["votes"] if v["user_id"] == user_id), None),
+                )
+                for r in records
+                if r["id"] not in live_ids
+            ]
 
-    return DashboardResponse(date=today, items=response_items)
+    order = {t: n for n, t in enumerate(ITEM_TYPES)}
+    page = [
+        DashboardResponse(date=day, items=sorted(items, key=lambda i: order.get(i.item_type, len(order))))
+        for day, items in list(by_day.items())[:days]
+    ]
+    next_before = page[-1].date if len(by_day) > days else None
+    return page, next_before
+
+
+@router.get("/history", response_model=DashboardHistoryResponse)
+async def dashboard_history(
+    start: date_type | None = Query(None, description="oldest date to include"),
+    end: date_type | None = Query(None, description="newest date to include (default: today)"),
+    limit: int = Query(14, ge=1, le=HISTORY_MAX_DAYS_PER_PAGE, description="days per page"),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    include_archived: bool = Query(False, description="continue into days moved out by retention (slower)"),
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Past dashboards newest first, one entry per day with the stored items and the user's
+    votes. Memes are the stored snapshot (the voted-on meme once the user has voted).
+    Days older than the retention window are only included with include_archived=true.
+    """
+    before = decode_history_cursor(cursor) if cursor else None
+    days, next_before = await load_history_page(
+        db, current_user.id, start, end or date_type.today(), before, limit, include_archived
+    )
+    return DashboardHistoryResponse(
+        days=days,
+        next_cursor=encode_history_cursor(next_before) if next_before else None,
+    )
@@ -1,11 +1,12 @@
 import os
-from dotenv import load_dotenv
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 # Load .env variables (DATABASE_URL, etc.)
-load_dotenv()
+import config  # noqa: F401
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
@@ -15,6 +16,33 @@ engine = create_engine(DATABASE_URL, future=True)
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
+
+def _to_async_url(url: str) -> str:
+    """
+    Derive the asyncio driver URL from DATABASE_URL:
+    postgresql(+psycopg2) -> postgresql+asyncpg, sqlite -> sqlite+aiosqlite.
+    """
+    u = make_url(url)
+    backend = u.get_backend_name()
+    if backend == "postgresql":
+        u = u.set(drivername="postgresql+asyncpg")
+        # asyncpg takes `ssl` instead of libpq's `sslmode`
+        if "sslmode" in u.query:
+            query = dict(u.query)
+            query["ssl"] = query.pop("sslmode")
+            u = u.set(query=query)
+    elif backend == "sqlite":
+        u = u.set(drivername="sqlite+aiosqlite")
+    return u.render_as_string(hide_password=False)
+
+
+# Async engine for async routes (dashboard, auth dependency), so queries don't block the event loop.
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _to_async_url(DATABASE_URL)
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
@@ -28,3 +56,27 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def dialect_insert(db):
+    """
+    Dialect-specific insert() for the session's database, so callers can use
+    ON CONFLICT clauses on both Postgres and SQLite.
+    """
+    name = db.get_bind().dialect.name
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"Unsupported database dialect: {name}")
+    return insert
+
+
+async def get_async_db():
+    """
+    FastAPI dependency for async routes.
+    Yields an AsyncSession and ensures it closes after request.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
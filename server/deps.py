@@ -1,26 +1,117 @@
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError
 
-from db import get_db
+from db import get_async_db
 from models import User
-from auth_utils import decode_access_token
+from auth_utils import decode_access_token_claims
+from metrics import stage
 
 security = HTTPBearer()
 
 
-def get_current_user(
+@dataclass(frozen=True)
+class CurrentUser:
+    """Lightweight authenticated principal; enough for routes that only need the id."""
+    id: int
+    email: str
+    name: str
+
+
+# Verified token -> principal. Bounded LRU; entries expire after the TTL or at the
+# token's own `exp`, whichever comes first. Process-local: a deleted user's tokens
+# stay valid in other workers for at most the TTL.
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "300"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+_PRINCIPALS: OrderedDict[str, tuple[CurrentUser, float]] = OrderedDict()
+_TOKENS_BY_USER: dict[int, set[str]] = {}
+
+
+def _cache_get(token: str) -> CurrentUser | None:
+    entry = _PRINCIPALS.get(token)
+    if entry is None:
+        return None
+    principal, expires_at = entry
+    if time.time() >= expires_at:
+        _cache_drop(token)
+        return None
+    _PRINCIPALS.move_to_end(token)
+    return principal
+
+
+def _cache_put(token: str, principal: CurrentUser, token_exp: float) -> None:
+    _PRINCIPALS[token] = (principal, min(time.time() + PRINCIPAL_CACHE_TTL_SECONDS, token_exp))
+    _TOKENS_BY_USER.setdefault(principal.id, set()).add(token)
+    while len(_PRINCIPALS) > PRINCIPAL_CACHE_MAX_ENTRIES:
+        oldest, _ = next(iter(_PRINCIPALS.items()))
+        _cache_drop(oldest)
+
+
+def _cache_drop(token: str) -> None:
+    entry = _PRINCIPALS.pop(token, None)
+    if entry is not None:
+        tokens = _TOKENS_BY_USER.get(entry[0].id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del _TOKENS_BY_USER[entry[0].id]
+
+
+def invalidate_user(user_id: int) -> None:
+    """Forget every cached token of a user (called when the user row is deleted)."""
+    for token in list(_TOKENS_BY_USER.get(user_id, ())):
+        _cache_drop(token)
+
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(mapper, connection, target):
+    invalidate_user(target.id)
+
+
+async def get_current_principal(
     creds: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
-    token = creds.credentials
+    db: AsyncSession = Depends(get_async_db),
+) -> CurrentUser:
+    with stage("auth"):
+        return await _resolve_principal(creds.credentials, db)
+
+
+async def _resolve_principal(token: str, db: AsyncSession) -> CurrentUser:
+    principal = _cache_get(token)
+    if principal is not None:
+        return principal
+
     try:
-        user_id = decode_access_token(token)
-    except JWTError:
+        claims = decode_access_token_claims(token)
+        user_id = int(claims["sub"])
+    except (JWTError, KeyError, ValueError):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    row = (
+        await db.execute(select(User.id, User.email, User.name).where(User.id == user_id))
+    ).first()
+    if not row:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+
+    principal = CurrentUser(id=row.id, email=row.email, name=row.name)
+    _cache_put(token, principal, float(claims.get("exp", time.time())))
+    return principal
+
+
+async def get_current_user(
+    principal: CurrentUser = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
+) -> User:
+    """Full ORM User, for routes that need more than the principal."""
+    user = await db.get(User, principal.id)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     return user
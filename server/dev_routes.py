@@ -3,22 +3,24 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from db import get_db
-from deps import get_current_user
-from models import DashboardItem, User
+from deps import CurrentUser, get_current_principal
+from models import DashboardItem
+from payload_store import store_payload_sync
 
 router = APIRouter(prefix="/dev", tags=["dev"])
 
 
 @router.post("/seed_item")
 def seed_item(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
+    payload = {"title": "Seed item", "source": "dev", "url": "https://example.com"}
     item = DashboardItem(
         user_id=current_user.id,
         date=date.today(),
         item_type="news",
-        payload={"title": "Seed item", "source": "dev", "url": "https://example.com"},
+        payload_hash=store_payload_sync(db, payload),
     )
     db.add(item)
     db.commit()
@@ -0,0 +1,36 @@
+"""
+Conditional GET: strong ETags built from the values a response is rendered from, and the
+If-None-Match check, so a handler can answer 304 before doing its expensive part.
+
+Responses carry `Cache-Control: private, no-cache`: clients may keep them but must
+revalidate every time, which is exactly the If-None-Match round trip.
+"""
+import hashlib
+import json
+
+from fastapi import Request, Response
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    raw = json.dumps(parts, separators=(",", ":"), sort_keys=True, default=str)
+    return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # If-None-Match compares weakly (RFC 9110 13.1.2), so a W/ prefix still matches
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag in tags
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
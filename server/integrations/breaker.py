@@ -0,0 +1,200 @@
+"""
+Per-provider circuit breakers with adaptive timeouts.
+
+Each upstream provider (see http_clients.PROVIDERS) gets a breaker that keeps a rolling
+window of call outcomes and latencies:
+
+- closed:    calls go through; the timeout is derived from the observed p99 latency
+             (x TIMEOUT_MULTIPLIER, clamped between the floor and the provider's
+             configured timeout) instead of always waiting out the full fixed timeout.
+- open:      the error rate crossed the threshold; calls short-circuit for OPEN_SECONDS,
+             serving the caller's fallback (last good cached payload) if it has one.
+- half_open: after OPEN_SECONDS one probe call is let through; success closes the
+             breaker, failure re-opens it.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+import httpx
+
+from integrations.http_clients import PROVIDERS
+from metrics import observe_integration
+from integrations.rate_limit import RateLimitTimeout, get_bucket
+
+WINDOW_SECONDS = float(os.getenv("BREAKER_WINDOW_SECONDS", "60"))
+MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+ERROR_THRESHOLD = float(os.getenv("BREAKER_ERROR_THRESHOLD", "0.5"))
+OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+TIMEOUT_MULTIPLIER = float(os.getenv("BREAKER_TIMEOUT_MULTIPLIER", "2.0"))
+TIMEOUT_FLOOR_SECONDS = float(os.getenv("BREAKER_TIMEOUT_FLOOR_SECONDS", "1.0"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, provider: str):
+        super().__init__(f"{provider} circuit is open")
+        self.provider = provider
+
+
+def _is_provider_failure(exc: BaseException) -> bool:
+    # a 4xx (other than 429) is our request's fault, not a sign the provider is unhealthy
+    if isinstance(exc, httpx.HTTPStatusError):
+        code = exc.response.status_code
+        return code >= 500 or code == 429
+    return True
+
+
+def _retry_after(exc: BaseException) -> float | None:
+    if isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code == 429:
+        try:
+            return float(exc.response.headers.get("Retry-After", "5"))
+        except ValueError:
+            return 5.0
+    return None
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, max_timeout: float):
+        self.name = name
+        self.max_timeout = max_timeout
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._samples: deque[tuple[float, float, bool]] = deque()  # (at, latency, ok)
+        self.short_circuited = 0
+
+    def _trim(self, now: float) -> None:
+        while self._samples and now - self._samples[0][0] > WINDOW_SECONDS:
+            self._samples.popleft()
+
+    def error_rate(self) -> float:
+        self._trim(time.monotonic())
+        if not self._samples:
+            return 0.0
+        return sum(1 for _, _, ok in self._samples if not ok) / len(self._samples)
+
+    def latency_percentile(self, pct: float) -> float | None:
+        self._trim(time.monotonic())
+        latencies = sorted(lat for _, lat, ok in self._samples if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * pct / 100))]
+
+    def current_timeout(self) -> float:
+        p99 = self.latency_percentile(99)
+        if p99 is None or len(self._samples) < MIN_CALLS:
+            return self.max_timeout
+        return min(self.max_timeout, max(TIMEOUT_FLOOR_SECONDS, p99 * TIMEOUT_MULTIPLIER))
+
+    def allow_request(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self.opened_at >= OPEN_SECONDS:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record(self, ok: bool, latency: float) -> None:
+        now = time.monotonic()
+        self._samples.append((now, latency, ok))
+        self._trim(now)
+
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = False
+            if ok:
+                self.state = CLOSED
+                self._samples.clear()
+            else:
+                self._open(now)
+            return
+
+        if self.state == CLOSED and len(self._samples) >= MIN_CALLS and self.error_rate() >= ERROR_THRESHOLD:
+            self._open(now)
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self.opened_at = now
+
+    async def call(self, fn: Callable[[], Awaitable[Any]], fallback: Callable[[], Awaitable[Any]] | None = None) -> Any:
+        """
+        Run `fn()` under the provider's rate limit and the adaptive timeout. When the
+        breaker is open, no token is available before the queue deadline, or the call
+        fails, `await fallback()` is returned instead if it yields a value (not None);
+        otherwise the error (CircuitOpenError / RateLimitTimeout) propagates.
+        """
+        if not self.allow_request():
+            self.short_circuited += 1
+            observe_integration(self.name, "short_circuited", 0.0)
+            value = await fallback() if fallback else None
+            if value is None:
+                raise CircuitOpenError(self.name)
+            return value
+
+        # wait for a token before starting the clock, so queueing doesn't skew the latency window
+        try:
+            await get_bucket(self.name).acquire()
+        except asyncio.CancelledError:
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+            raise
+        except RateLimitTimeout:
+            observe_integration(self.name, "rate_limited", 0.0)
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+            value = await fallback() if fallback else None
+            if value is None:
+                raise
+            return value
+
+        start = time.monotonic()
+        try:
+            result = await asyncio.wait_for(fn(), timeout=self.current_timeout())
+        except asyncio.CancelledError:
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+            raise
+        except Exception as e:
+            elapsed = time.monotonic() - start
+            self.record(not _is_provider_failure(e), elapsed)
+            observe_integration(self.name, "timeout" if isinstance(e, asyncio.TimeoutError) else "error", elapsed)
+            retry_after = _retry_after(e)
+            if retry_after:
+                get_bucket(self.name).pause(retry_after)
+            value = await fallback() if fallback else None
+            if value is None:
+                raise
+            return value
+
+        elapsed = time.monotonic() - start
+        self.record(True, elapsed)
+        observe_integration(self.name, "ok", elapsed)
+        return result
+
+    def snapshot(self) -> dict:
+        p50, p99 = self.latency_percentile(50), self.latency_percentile(99)
+        return {
+            "state": self.state,
+            "error_rate": round(self.error_rate(), 3),
+            "calls_in_window": len(self._samples),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+            "timeout_s": round(self.current_timeout(), 2),
+            "short_circuited": self.short_circuited,
+        }
+
+
+BREAKERS = {name: CircuitBreaker(name, max_timeout=profile.timeout) for name, profile in PROVIDERS.items()}
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    return BREAKERS[provider]
+
+
+def breaker_states() -> dict:
+    return {name: b.snapshot() for name, b in BREAKERS.items()}
@@ -0,0 +1,177 @@
+"""
+Process-wide caching helpers shared by the integrations.
+
+SingleFlight - coalesces concurrent misses so only one upstream call runs per key.
+TTLCache     - bounded key/value store with per-entry expiry and hit/miss counters, plus
+               get_or_fetch() with request coalescing and stale-while-revalidate. Storage is
+               pluggable (per-process LRU, SQLite or Redis; see cache_backends.py).
+"""
+import asyncio
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Hashable, Iterable
+
+from integrations.cache_backends import CacheBackend, MemoryBackend, make_backend
+
+
+class SingleFlight:
+    """
+    One shared task per key. The upstream call runs as its own task, so a caller that
+    gets cancelled (e.g. by a dashboard deadline) doesn't cancel it for everyone else.
+    """
+
+    def __init__(self):
+        self._tasks: dict[Hashable, asyncio.Task] = {}
+
+    def get(self, key: Hashable) -> asyncio.Task | None:
+        return self._tasks.get(key)
+
+    def start(self, keys: Iterable[Hashable], coro: Awaitable) -> asyncio.Task:
+        """Run `coro` once and register it as the in-flight call for every key in `keys`."""
+        keys = list(keys)
+        task = asyncio.ensure_future(coro)
+        for key in keys:
+            self._tasks[key] = task
+
+        def _done(t: asyncio.Task) -> None:
+            for key in keys:
+                if self._tasks.get(key) is t:
+                    del self._tasks[key]
+            if not t.cancelled():
+                t.exception()  # mark retrieved; waiters re-raise it themselves
+
+        task.add_done_callback(_done)
+        return task
+
+    async def do(self, key: Hashable, coro_fn) -> Any:
+        task = self._tasks.get(key) or self.start([key], coro_fn())
+        return await asyncio.shield(task)
+
+
+class TTLCache:
+    """
+    Key/value cache with per-entry TTL on top of a pluggable storage backend.
+
+    With a `namespace` the storage comes from CACHE_BACKEND (see cache_backends.py),
+    so workers can share entries; without one it's a per-process LRU. Entries are
+    kept for `retain_seconds` (default 10x the TTL) after they go stale, so peek()
+    can still serve the last good value while a provider is down.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_entries: int = 10_000,
+        namespace: str | None = None,
+        retain_seconds: float | None = None,
+        backend: CacheBackend | None = None,
+    ):
+        self.name = namespace or "local"
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.retain_seconds = retain_seconds if retain_seconds is not None else ttl_seconds * 10
+        if backend is None:
+            backend = make_backend(namespace, max_entries) if namespace else MemoryBackend(max_entries)
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self._flight = SingleFlight()
+        _INSTANCES.add(self)
+
+    @staticmethod
+    def instances() -> list["TTLCache"]:
+        """Live caches, for metrics."""
+        return list(_INSTANCES)
+
+    async def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = await self.backend.get(key)
+        if entry is None or time.time() - entry[1] > self.ttl_seconds:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return entry[0]
+
+    async def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Last stored value regardless of age (for serving stale data while a provider is down)."""
+        entry = await self.backend.get(key)
+        return default if entry is None else entry[0]
+
+    async def age(self, key: Hashable) -> float | None:
+        """Seconds since `key` was stored, or None if it isn't stored."""
+        entry = await self.backend.get(key)
+        return None if entry is None else time.time() - entry[1]
+
+    async def set(self, key: Hashable, value: Any) -> None:
+        await self.backend.set(key, value, time.time(), max(self.ttl_seconds, self.retain_seconds))
+
+    async def acquire_lease(self, key: Hashable, seconds: float) -> bool:
+        """
+        Claim `key` for `seconds` in the backend, so only one of the workers sharing it
+        refreshes the entry. False while someone else holds it; leases just expire.
+        """
+        return await self.backend.lease(key, seconds)
+
+    async def delete(self, key: Hashable) -> None:
+        await self.backend.delete(key)
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+
+    async def get_or_fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        stale_ttl_seconds: float = 0,
+        should_cache: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """
+        Return the cached value for `key`, calling `fetch()` on a miss.
+
+        Concurrent misses share one fetch. Entries past their TTL but within
+        `stale_ttl_seconds` are served immediately while a single background
+        refresh replaces them. Values rejected by `should_cache` are returned
+        but not stored (e.g. provider error payloads).
+        """
+        entry = await self.backend.get(key)
+        if entry is not None:
+            age = time.time() - entry[1]
+            if age <= self.ttl_seconds:
+                self.hits += 1
+                return entry[0]
+            if age <= self.ttl_seconds + stale_ttl_seconds:
+                self.stale_hits += 1
+                if self._flight.get(key) is None:
+                    self._flight.start([key], self._fetch_and_store(key, fetch, should_cache))
+                return entry[0]
+
+        self.misses += 1
+        return await self._flight.do(key, lambda: self._fetch_and_store(key, fetch, should_cache))
+
+    async def refresh(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        should_cache: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """Fetch and store `key` now (e.g. ahead of expiry), joining a fetch already in flight."""
+        return await self._flight.do(key, lambda: self._fetch_and_store(key, fetch, should_cache))
+
+    async def _fetch_and_store(self, key: Hashable, fetch, should_cache) -> Any:
+        value = await fetch()
+        if should_cache(value):
+            await self.set(key, value)
+        return value
+
+    async def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            **await self.backend.stats(),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 3) if lookups else None,
+        }
+
+
+_INSTANCES: "weakref.WeakSet[TTLCache]" = weakref.WeakSet()
@@ -0,0 +1,317 @@
+"""
+Storage backends for TTLCache.
+
+A backend stores (value, stored_at) per key with a retention deadline and a size bound;
+TTLCache decides freshness (TTL / stale window) on top of it and keeps hit/miss counters.
+
+memory    - per-process LRU (default).
+sqlite    - a SQLite file shared by every worker on the host (CACHE_BACKEND=sqlite:///path).
+redis     - any Redis-compatible server (CACHE_BACKEND=redis://host:port/db). Needs the
+            optional `redis` package (redis.asyncio); RedisBackend also accepts a ready
+            asyncio client, so it can run against a local stand-in (e.g. fakeredis.aioredis).
+
+Shared backends serialize keys and values as JSON, so cached values must be plain
+JSON data (tuples come back as lists).
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Hashable
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+
+
+class CacheBackend(ABC):
+    """Async storage interface: shared backends do I/O, which must not block the event loop."""
+
+    name = "base"
+
+    def __init__(self):
+        self.evictions = 0
+
+    @abstractmethod
+    async def get(self, key: Hashable) -> tuple[Any, float] | None:
+        """(value, stored_at) for a key that hasn't passed its retention deadline, else None."""
+
+    @abstractmethod
+    async def set(self, key: Hashable, value: Any, stored_at: float, retain_seconds: float) -> None:
+        ...
+
+    @abstractmethod
+    async def lease(self, key: Hashable, seconds: float) -> bool:
+        """
+        Set-if-absent on a lock key kept apart from the entries (no size or LRU effect):
+        True if the caller now holds `key` for `seconds`, False while someone else does.
+        """
+
+    @abstractmethod
+    async def delete(self, key: Hashable) -> None:
+        ...
+
+    @abstractmethod
+    async def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    async def size(self) -> int:
+        ...
+
+    async def stats(self) -> dict:
+        return {"backend": self.name, "size": await self.size(), "evictions": self.evictions}
+
+
+class MemoryBackend(CacheBackend):
+    name = "memory"
+
+    def __init__(self, max_entries: int):
+        super().__init__()
+        self.max_entries = max_entries
+        self._data: OrderedDict[Hashable, tuple[Any, float, float]] = OrderedDict()
+        self._leases: dict[Hashable, float] = {}
+
+    async def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if time.time() > entry[2]:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry[0], entry[1]
+
+    async def set(self, key, value, stored_at, retain_seconds):
+        self._data[key] = (value, stored_at, stored_at + retain_seconds)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    async def lease(self, key, seconds):
+        now = time.time()
+        if self._leases.get(key, 0) > now:
+            return False
+        self._leases = {k: t for k, t in self._leases.items() if t > now}
+        self._leases[key] = now + seconds
+        return True
+
+    async def delete(self, key):
+        self._data.pop(key, None)
+
+    async def clear(self):
+        self._data.clear()
+
+    async def size(self):
+        return len(self._data)
+
+
+def _encode_key(key: Hashable) -> str:
+    return json.dumps(key, separators=(",", ":"), default=str)
+
+
+class SqliteBackend(CacheBackend):
+    """
+    One table shared by all namespaces. Reads don't write, so eviction past max_entries
+    drops the oldest-written entries first rather than strict LRU. Queries run in worker
+    threads (one connection per thread), off the event loop.
+    """
+
+    name = "sqlite"
+    PRUNE_EVERY = 100  # sets between size checks
+
+    def __init__(self, path: str, namespace: str, max_entries: int):
+        super().__init__()
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self._sets = 0
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+            "stored_at REAL NOT NULL, expires_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_cache_entries_ns_stored ON cache_entries (namespace, stored_at)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_leases ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, expires_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    async def get(self, key):
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key, value, stored_at, retain_seconds):
+        await asyncio.to_thread(self._set, key, value, stored_at, retain_seconds)
+
+    async def lease(self, key, seconds):
+        return await asyncio.to_thread(self._lease, key, seconds)
+
+    async def delete(self, key):
+        await asyncio.to_thread(self._delete, key)
+
+    async def clear(self):
+        await asyncio.to_thread(self._clear)
+
+    async def size(self):
+        return await asyncio.to_thread(self._size)
+
+    def _get(self, key):
+        row = self._conn().execute(
+            "SELECT value, stored_at FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (self.namespace, _encode_key(key), time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def _set(self, key, value, stored_at, retain_seconds):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries (namespace, key, value, stored_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (self.namespace, _encode_key(key), json.dumps(value), stored_at, stored_at + retain_seconds),
+        )
+        self._sets += 1
+        if self._sets % self.PRUNE_EVERY == 0:
+            self._prune(conn)
+
+    def _lease(self, key, seconds) -> bool:
+        # one statement, so two workers can't both take over an expired lease
+        now = time.time()
+        cur = self._conn().execute(
+            "INSERT INTO cache_leases (namespace, key, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (namespace, key) DO UPDATE SET expires_at = excluded.expires_at "
+            "WHERE cache_leases.expires_at <= ?",
+            (self.namespace, _encode_key(key), now + seconds, now),
+        )
+        return cur.rowcount == 1
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        cur = conn.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?", (self.namespace, time.time())
+        )
+        self.evictions += cur.rowcount
+        excess = self._size() - self.max_entries
+        if excess > 0:
+            cur = conn.execute(
+                "DELETE FROM cache_entries WHERE rowid IN ("
+                "SELECT rowid FROM cache_entries WHERE namespace = ? ORDER BY stored_at LIMIT ?)",
+                (self.namespace, excess),
+            )
+            self.evictions += cur.rowcount
+
+    def _delete(self, key):
+        self._conn().execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, _encode_key(key))
+        )
+
+    def _clear(self):
+        self._conn().execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+
+    def _size(self) -> int:
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ? AND expires_at > ?",
+            (self.namespace, time.time()),
+        ).fetchone()[0]
+
+
+class RedisBackend(CacheBackend):
+    """
+    Values live under "<namespace>:<key>" with PX = retention. A sorted set
+    "<namespace>:__lru__" scores keys by last access, and sets past max_entries
+    drop the least recently used ones. Takes an asyncio client (redis.asyncio).
+    """
+
+    name = "redis"
+
+    def __init__(self, client, namespace: str, max_entries: int):
+        super().__init__()
+        self.client = client
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self._lru = f"{namespace}:__lru__"
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{_encode_key(key)}"
+
+    async def get(self, key):
+        rkey = self._key(key)
+        raw = await self.client.get(rkey)
+        if raw is None:
+            await self.client.zrem(self._lru, rkey)
+            return None
+        await self.client.zadd(self._lru, {rkey: time.time()})
+        value, stored_at = json.loads(raw)
+        return value, stored_at
+
+    async def set(self, key, value, stored_at, retain_seconds):
+        rkey = self._key(key)
+        pipe = self.client.pipeline()
+        pipe.set(rkey, json.dumps([value, stored_at]), px=max(1, int(retain_seconds * 1000)))
+        pipe.zadd(self._lru, {rkey: time.time()})
+        pipe.zcard(self._lru)
+        count = (await pipe.execute())[-1]
+        if count > self.max_entries:
+            victims = [k for k, _ in await self.client.zpopmin(self._lru, count - self.max_entries)]
+            if victims:
+                await self.client.delete(*victims)
+                self.evictions += len(victims)
+
+    async def lease(self, key, seconds):
+        # SET NX PX under its own prefix; not in the LRU set, Redis expires it
+        rkey = f"{self.namespace}:__lease__:{_encode_key(key)}"
+        return bool(await self.client.set(rkey, "1", px=max(1, int(seconds * 1000)), nx=True))
+
+    async def delete(self, key):
+        rkey = self._key(key)
+        await self.client.delete(rkey)
+        await self.client.zrem(self._lru, rkey)
+
+    async def clear(self):
+        keys = await self.client.zrange(self._lru, 0, -1)
+        if keys:
+            await self.client.delete(*keys)
+        await self.client.delete(self._lru)
+
+    async def size(self):
+        return await self.client.zcard(self._lru)
+
+
+_REDIS_CLIENT = None
+
+
+def _redis_client(url: str):
+    global _REDIS_CLIENT
+    if _REDIS_CLIENT is None:
+        try:
+            import redis.asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis://... requires the `redis` package") from e
+        _REDIS_CLIENT = aioredis.Redis.from_url(url, decode_responses=True, socket_timeout=0.5)
+    return _REDIS_CLIENT
+
+
+def make_backend(namespace: str, max_entries: int, spec: str | None = None) -> CacheBackend:
+    """Backend for one cache namespace, chosen by `spec` (default: CACHE_BACKEND)."""
+    spec = spec or CACHE_BACKEND
+    if spec.startswith("sqlite:///"):
+        return SqliteBackend(spec[len("sqlite:///"):], namespace, max_entries)
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(_redis_client(spec), namespace, max_entries)
+    return MemoryBackend(max_entries)
@@ -1,8 +1,18 @@
-import httpx
+import asyncio
 import os
 
+import config  # noqa: F401
+from integrations.breaker import get_breaker
+from integrations.cache import SingleFlight, TTLCache
+from integrations.http_clients import get_client
+
 BASE_URL = os.getenv("COINGECKO_BASE_URL", "https://api.coingecko.com/api/v3")
 
+# Process-wide USD price per CoinGecko ID, shared by all users
+PRICE_CACHE_TTL_SECONDS = float(os.getenv("PRICE_CACHE_TTL_SECONDS", "60"))
+_PRICE_CACHE = TTLCache(ttl_seconds=PRICE_CACHE_TTL_SECONDS, namespace="coingecko.prices")
+_INFLIGHT = SingleFlight()
+
 # Map symbols to CoinGecko IDs 
 SYMBOL_TO_ID = {
     "BTC": "bitcoin",
@@ -15,24 +25,95 @@ SYMBOL_TO_ID = {
     "ADA": "cardano",
 }
 
-async def fetch_prices_usd(symbols: list[str]) -> dict:
-    ids = [SYMBOL_TO_ID[s] for s in symbols if s in SYMBOL_TO_ID]
-    if not ids:
-        return {"note": "No supported assets selected", "prices_usd": {}}
+async def price_cache_stats() -> dict:
+    return await _PRICE_CACHE.stats()
+
 
+async def _fetch_upstream(ids: list[str]) -> tuple[dict[str, float], bool]:
+    """Prices from one /simple/price call, and whether they're the last good ones instead."""
     url = f"{BASE_URL}/simple/price"
     params = {"ids": ",".join(ids), "vs_currencies": "usd"}
 
-    async with httpx.AsyncClient(timeout=10) as client:
-        r = await client.get(url, params=params)
+    async def request():
+        r = await get_client("coingecko").get(url, params=params)
         r.raise_for_status()
-        data = r.json()
+        return r.json()
+
+    stale = False
+
+    async def last_good():
+        # while CoinGecko is unhealthy, serve the last known prices if we have all of them
+        nonlocal stale
+        last = {cid: await _PRICE_CACHE.peek(cid) for cid in ids}
+        if all(v is not None for v in last.values()):
+            stale = True
+            return {cid: {"usd": v} for cid, v in last.items()}
+        return None
+
+    data = await get_breaker("coingecko").call(request, fallback=last_good)
+
+    prices = {}
+    for cid in ids:
+        if cid in data and "usd" in data[cid]:
+            prices[cid] = data[cid]["usd"]
+            # last good prices keep their original age, so they're retried rather than trusted
+            if not stale:
+                await _PRICE_CACHE.set(cid, prices[cid])
+    return prices, stale
+
+
+async def get_prices_by_id(ids: list[str]) -> tuple[dict[str, float], bool]:
+    """
+    USD prices for CoinGecko IDs, and whether any are last good prices served while
+    CoinGecko is down. Fresh cache hits are served from memory; all remaining misses
+    go out in ONE batched /simple/price call, and IDs already being fetched by a
+    concurrent request join that in-flight call instead.
+    """
+    prices = {}
+    stale = False
+    missing = []
+    for cid in dict.fromkeys(ids):
+        price = await _PRICE_CACHE.get(cid)
+        if price is None:
+            missing.append(cid)
+        else:
+            prices[cid] = price
+
+    if not missing:
+        return prices, stale
+
+    tasks = {cid: _INFLIGHT.get(cid) for cid in missing}
+    to_fetch = [cid for cid, task in tasks.items() if task is None]
+    if to_fetch:
+        batch = _INFLIGHT.start(to_fetch, _fetch_upstream(to_fetch))
+        for cid in to_fetch:
+            tasks[cid] = batch
+
+    for task in set(tasks.values()):
+        data, task_stale = await asyncio.shield(task)
+        stale = stale or task_stale
+        for cid in missing:
+            if cid in data:
+                prices[cid] = data[cid]
+
+    return prices, stale
+
+
+async def fetch_prices_usd(symbols: list[str]) -> dict:
+    ids = [SYMBOL_TO_ID[s] for s in symbols if s in SYMBOL_TO_ID]
+    if not ids:
+        return {"note": "No supported assets selected", "prices_usd": {}}
+
+    data, stale = await get_prices_by_id(ids)
 
     # Convert back to symbols for your UI
     prices = {}
     for sym in symbols:
         cid = SYMBOL_TO_ID.get(sym)
-        if cid and cid in data and "usd" in data[cid]:
-            prices[sym] = data[cid]["usd"]
+        if cid and cid in data:
+            prices[sym] = data[cid]
 
-    return {"prices_usd": prices, "source": "coingecko"}
+    payload = {"prices_usd": prices, "source": "coingecko"}
+    if stale:
+        payload["stale"] = True
+    return payload
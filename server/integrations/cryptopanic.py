@@ -1,5 +1,9 @@
 import os
-import httpx
+
+import config  # noqa: F401
+from integrations.breaker import get_breaker
+from integrations.cache import TTLCache
+from integrations.http_clients import get_client
 
 BASE_URL = os.getenv(
     "CRYPTOPANIC_BASE_URL",
@@ -7,6 +11,20 @@ BASE_URL = os.getenv(
 )
 API_KEY = os.getenv("CRYPTOPANIC_API_KEY")
 
+# Shared across users: keyed by the normalized currency set, so ["ETH","BTC"] and
+# ["BTC","ETH","btc"] hit the same entry. Stale entries are served while one refresh runs.
+NEWS_CACHE_TTL_SECONDS = float(os.getenv("NEWS_CACHE_TTL_SECONDS", "300"))
+NEWS_STALE_SECONDS = float(os.getenv("NEWS_STALE_SECONDS", "900"))
+_NEWS_CACHE = TTLCache(ttl_seconds=NEWS_CACHE_TTL_SECONDS, max_entries=1_000, namespace="cryptopanic.news")
+
+
+def normalize_currencies(assets: list[str]) -> tuple[str, ...]:
+    return tuple(sorted({a.strip().upper() for a in assets if a and a.strip()}))
+
+
+async def news_cache_stats() -> dict:
+    return await _NEWS_CACHE.stats()
+
 
 async def fetch_market_news(assets: list[str]) -> dict:
     if not API_KEY:
@@ -16,18 +34,41 @@ async def fetch_market_news(assets: list[str]) -> dict:
             "source": "cryptopanic",
         }
 
+    currencies = normalize_currencies(assets)
+    return await _NEWS_CACHE.get_or_fetch(
+        currencies,
+        lambda: get_breaker("cryptopanic").call(
+            lambda: _fetch_upstream(currencies),
+            # while CryptoPanic is unhealthy, keep serving the last story for this currency set
+            fallback=lambda: _last_good(currencies),
+        ),
+        stale_ttl_seconds=NEWS_STALE_SECONDS,
+        should_cache=_is_fresh,
+    )
+
+
+async def _last_good(currencies: tuple[str, ...]) -> dict | None:
+    story = await _NEWS_CACHE.peek(currencies)
+    return None if story is None else {**story, "stale": True}
+
+
+def _is_fresh(payload: dict) -> bool:
+    # a last good story keeps its original age in the cache, so the next miss retries
+    return not payload.get("stale")
+
+
+async def _fetch_upstream(currencies: tuple[str, ...]) -> dict:
     params = {
         "auth_token": API_KEY,
-        "currencies": ",".join(assets),
+        "currencies": ",".join(currencies),
         "kind": "news",
         # "filter": "hot",
         "public": "true",
     }
 
-    async with httpx.AsyncClient(timeout=10) as client:
-        r = await client.get(BASE_URL, params=params)
-        r.raise_for_status()
-        data = r.json()
+    r = await get_client("cryptopanic").get(BASE_URL, params=params)
+    r.raise_for_status()
+    data = r.json()
 
     results = data.get("results", [])
     if not results:
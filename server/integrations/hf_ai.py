@@ -1,15 +1,56 @@
 import os
-import httpx
+from datetime import date
+
+import config  # noqa: F401
+from integrations.breaker import get_breaker
+from integrations.cache import TTLCache
+from integrations.http_clients import get_client
 
 HF_TOKEN = os.getenv("HF_TOKEN")
 HF_MODEL = os.getenv("HF_MODEL", "openai/gpt-oss-120b:fastest")
 HF_ROUTER_BASE = os.getenv("HF_ROUTER_BASE_URL", "https://router.huggingface.co/v1")
 
+# One generated insight per preference profile per day, shared by all users with that profile.
+# The date is part of the key, so entries aren't needed past the TTL (retain_seconds = TTL).
+_INSIGHT_CACHE = TTLCache(
+    ttl_seconds=24 * 60 * 60, max_entries=5_000, namespace="hf.insights", retain_seconds=24 * 60 * 60
+)
+# Most recent good insight per profile (any day), served while the HF router circuit is open
+_LAST_GOOD_INSIGHT = TTLCache(
+    ttl_seconds=7 * 24 * 60 * 60, max_entries=5_000, namespace="hf.last_good", retain_seconds=7 * 24 * 60 * 60
+)
+
+
+def profile_key(preferences: dict) -> tuple:
+    assets = preferences.get("assets") or []
+    content_types = preferences.get("content_types") or []
+    return (
+        tuple(sorted({a.strip().upper() for a in assets if a and a.strip()})),
+        (preferences.get("investor_type") or "crypto investor").strip().lower(),
+        tuple(sorted({c.strip().lower() for c in content_types if c and c.strip()})),
+    )
+
+
+def _is_real_insight(payload: dict) -> bool:
+    # notices (e.g. missing token) and stale fallbacks are not cached, so the next miss retries them
+    return (
+        "error" not in payload
+        and not payload.get("stale")
+        and not payload.get("text", "").startswith("AI insight unavailable")
+    )
+
+
+async def insight_cache_stats() -> dict:
+    return await _INSIGHT_CACHE.stats()
+
 
 async def fetch_ai_insight(preferences: dict) -> dict:
     """
     Uses Hugging Face Inference Providers OpenAI-compatible endpoint.
     Endpoint: POST {HF_ROUTER_BASE}/chat/completions
+
+    Insights are cached per (day, normalized preference profile); concurrent
+    misses for the same profile share one generation.
     """
     if not HF_TOKEN:
         return {
@@ -17,6 +58,15 @@ async def fetch_ai_insight(preferences: dict) -> dict:
             "source": "huggingface",
         }
 
+    key = (date.today().isoformat(), *profile_key(preferences))
+    return await _INSIGHT_CACHE.get_or_fetch(
+        key,
+        lambda: _generate_insight(preferences),
+        should_cache=_is_real_insight,
+    )
+
+
+async def _generate_insight(preferences: dict) -> dict:
     assets = preferences.get("assets", [])
     investor_type = preferences.get("investor_type", "crypto investor")
     content_types = preferences.get("content_types", [])
@@ -43,47 +93,32 @@ async def fetch_ai_insight(preferences: dict) -> dict:
         "max_tokens": 500,
     }
 
+    async def request():
+        r = await get_client("huggingface").post(url, headers=headers, json=body)
+        r.raise_for_status()
+        return r.json()
+
     try:
-        async with httpx.AsyncClient(timeout=45) as client:
-            r = await client.post(url, headers=headers, json=body)
-            r.raise_for_status()
-            data = r.json()
+        data = await get_breaker("huggingface").call(request)
 
         text = (
             (data.get("choices") or [{}])[0]
             .get("message", {})
             .get("content", "")
         )
-        print("start")
-        print("RAW RESPONSE:", data)
-        print(data.get("choices")[0]
-            .get("message", {})
-            .get("content", "")
-        )
-        print("end")
         text = (text or "").strip()
         if not text:
-            return {
-                "text": "AI insight unavailable (empty response).",
-                "source": "huggingface",
-                "model": HF_MODEL,
-            }
+            raise ValueError("empty response")
 
-        return {"text": text, "source": "huggingface", "model": HF_MODEL}
+        payload = {"text": text, "source": "huggingface", "model": HF_MODEL}
+        await _LAST_GOOD_INSIGHT.set(profile_key(preferences), payload)
+        return payload
 
-    except httpx.HTTPStatusError as e:
-        # return a short error string inside payload to debug without crashing dashboard
-        details = e.response.text[:500]
-        return {
-            "text": "AI insight unavailable (provider error).",
-            "source": "huggingface",
-            "model": HF_MODEL,
-            "error": f"{e.response.status_code}: {details}",
-        }
-    except Exception as e:
-        return {
-            "text": "AI insight unavailable (provider error).",
-            "source": "huggingface",
-            "model": HF_MODEL,
-            "error": str(e)[:200],
-        }
+    except Exception:
+        # provider error or timeout, open circuit, no rate-limit token in time: serve the
+        # last good insight (marked stale), or raise so the dashboard stores a degraded
+        # fallback and retries it on the next load
+        last_good = await _LAST_GOOD_INSIGHT.peek(profile_key(preferences))
+        if last_good is not None:
+            return {**last_good, "stale": True}
+        raise
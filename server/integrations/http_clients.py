@@ -0,0 +1,141 @@
+"""
+Application-scoped, pooled HTTP clients for the upstream integrations.
+
+One httpx.AsyncClient per provider, opened in the FastAPI lifespan and closed on
+shutdown, so TCP/TLS connections are kept alive and reused across requests.
+Each provider has its own connection limits and timeout profile.
+"""
+import importlib.util
+import ssl
+from dataclasses import dataclass, field
+
+import certifi
+import httpx
+
+# HTTP/2 needs the optional `h2` package (httpx[http2]); fall back to HTTP/1.1 without it.
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+@dataclass(frozen=True)
+class ProviderProfile:
+    timeout: float
+    connect_timeout: float = 3.0
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 60.0
+    http2: bool = False
+    headers: dict = field(default_factory=dict)
+    # outbound token bucket (see rate_limit.py)
+    rate_per_second: float = 1.0
+    burst: float = 5.0
+
+
+PROVIDERS = {
+    # public CoinGecko API allows ~30 calls/minute
+    "coingecko": ProviderProfile(timeout=10, http2=True, rate_per_second=0.5, burst=10),
+    "cryptopanic": ProviderProfile(timeout=10, http2=True, rate_per_second=1.0, burst=5),
+    "huggingface": ProviderProfile(
+        timeout=45,
+        connect_timeout=5.0,
+        max_connections=10,
+        max_keepalive_connections=5,
+        http2=True,
+        rate_per_second=2.0,
+        burst=10,
+    ),
+    "reddit": ProviderProfile(
+        timeout=10,
+        max_connections=5,
+        max_keepalive_connections=2,
+        http2=True,
+        rate_per_second=0.5,
+        burst=5,
+        # Reddit wants a meaningful UA; keep it simple
+        headers={"User-Agent": "AI-Crypto-Advisor/1.0 (coding task; contact: none)"},
+    ),
+}
+
+_CLIENTS: dict[str, httpx.AsyncClient] = {}
+
+# Loading the CA bundle is the slow part of creating a client; do it once for all providers.
+_SSL_CONTEXT: ssl.SSLContext | None = None
+
+
+def _ssl_context() -> ssl.SSLContext:
+    global _SSL_CONTEXT
+    if _SSL_CONTEXT is None:
+        _SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
+    return _SSL_CONTEXT
+
+# Per-provider connection counters; reused = requests - new_connections
+_STATS: dict[str, dict] = {
+    name: {"requests": 0, "new_connections": 0, "tls_handshakes": 0} for name in PROVIDERS
+}
+
+
+def _make_tracer(provider: str):
+    stats = _STATS[provider]
+
+    async def trace(event_name: str, info: dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            stats["new_connections"] += 1
+        elif event_name == "connection.start_tls.complete":
+            stats["tls_handshakes"] += 1
+
+    return trace
+
+
+def _build_client(provider: str) -> httpx.AsyncClient:
+    profile = PROVIDERS[provider]
+    tracer = _make_tracer(provider)
+
+    async def on_request(request: httpx.Request) -> None:
+        _STATS[provider]["requests"] += 1
+        request.extensions["trace"] = tracer
+
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(profile.timeout, connect=profile.connect_timeout),
+        limits=httpx.Limits(
+            max_connections=profile.max_connections,
+            max_keepalive_connections=profile.max_keepalive_connections,
+            keepalive_expiry=profile.keepalive_expiry,
+        ),
+        http2=profile.http2 and HTTP2_AVAILABLE,
+        verify=_ssl_context(),
+        headers=profile.headers,
+        event_hooks={"request": [on_request]},
+    )
+
+
+def get_client(provider: str) -> httpx.AsyncClient:
+    """
+    Shared client for a provider. Created on first use if the lifespan hasn't opened it
+    (e.g. when integrations are called from scripts).
+    """
+    client = _CLIENTS.get(provider)
+    if client is None or client.is_closed:
+        client = _CLIENTS[provider] = _build_client(provider)
+    return client
+
+
+async def open_clients() -> None:
+    for provider in PROVIDERS:
+        get_client(provider)
+
+
+async def close_clients() -> None:
+    clients = list(_CLIENTS.values())
+    _CLIENTS.clear()
+    for client in clients:
+        await client.aclose()
+
+
+def connection_stats() -> dict:
+    out = {}
+    for provider, s in _STATS.items():
+        out[provider] = {
+            **s,
+            "reused_connections": max(0, s["requests"] - s["new_connections"]),
+            "http2": PROVIDERS[provider].http2 and HTTP2_AVAILABLE,
+        }
+    return out
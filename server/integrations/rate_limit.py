@@ -0,0 +1,232 @@
+"""
+Outbound rate limiting for upstream provider calls.
+
+Each provider gets a token bucket (rate/burst from its ProviderProfile, overridable via
+RATE_LIMIT_<PROVIDER>_PER_SECOND / RATE_LIMIT_<PROVIDER>_BURST). Callers that find the
+bucket empty wait in a priority queue: interactive requests are served before background
+warm-up traffic, and every waiter has a deadline after which it gives up with
+RateLimitTimeout instead of queueing forever.
+
+Tokens live in a store:
+- memory (default): per process.
+- sqlite:///path: a small SQLite file shared by all workers on the host, so N uvicorn
+  workers together stay under the provider's limit.
+"""
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import os
+import sqlite3
+import threading
+import time
+
+from integrations.http_clients import PROVIDERS
+
+INTERACTIVE, BACKGROUND = 0, 1
+
+# Max seconds a call waits for a token before giving up, by priority
+MAX_WAIT_SECONDS = {
+    INTERACTIVE: float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "2")),
+    BACKGROUND: float(os.getenv("RATE_LIMIT_BACKGROUND_MAX_WAIT_SECONDS", "60")),
+}
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "memory")
+
+_PRIORITY: contextvars.ContextVar[int] = contextvars.ContextVar("outbound_priority", default=INTERACTIVE)
+
+
+@contextlib.contextmanager
+def outbound_priority(priority: int):
+    """Mark outbound calls made in this context (and tasks spawned from it) with `priority`."""
+    token = _PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+class RateLimitTimeout(Exception):
+    def __init__(self, provider: str):
+        super().__init__(f"{provider} rate limit: no token before deadline")
+        self.provider = provider
+
+
+class MemoryTokenStore:
+    def __init__(self):
+        self._buckets: dict[str, tuple[float, float]] = {}  # name -> (tokens, updated_at)
+        self._paused_until: dict[str, float] = {}
+
+    def take(self, name: str, rate: float, burst: float) -> float:
+        """Take one token; return 0 on success, else seconds until one is available."""
+        now = time.time()
+        paused = self._paused_until.get(name, 0.0)
+        if paused > now:
+            return paused - now
+        tokens, updated = self._buckets.get(name, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        if tokens >= 1:
+            self._buckets[name] = (tokens - 1, now)
+            return 0.0
+        self._buckets[name] = (tokens, now)
+        return (1 - tokens) / rate
+
+    def pause(self, name: str, seconds: float) -> None:
+        self._paused_until[name] = max(self._paused_until.get(name, 0.0), time.time() + seconds)
+
+
+class SqliteTokenStore:
+    """Token buckets in a SQLite file, updated under BEGIN IMMEDIATE so workers don't race."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS token_buckets ("
+                "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, "
+                "paused_until REAL NOT NULL DEFAULT 0)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def take(self, name: str, rate: float, burst: float) -> float:
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated_at, paused_until FROM token_buckets WHERE name = ?", (name,)
+            ).fetchone()
+            tokens, updated, paused = row if row else (burst, now, 0.0)
+            if paused > now:
+                conn.execute("COMMIT")
+                return paused - now
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            if tokens >= 1:
+                tokens -= 1
+            conn.execute(
+                "INSERT INTO token_buckets (name, tokens, updated_at, paused_until) VALUES (?, ?, ?, 0) "
+                "ON CONFLICT(name) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                (name, tokens, now),
+            )
+            conn.execute("COMMIT")
+            return wait
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def pause(self, name: str, seconds: float) -> None:
+        conn = self._connect()
+        until = time.time() + seconds
+        conn.execute(
+            "INSERT INTO token_buckets (name, tokens, updated_at, paused_until) VALUES (?, 0, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET paused_until = MAX(paused_until, excluded.paused_until)",
+            (name, time.time(), until),
+        )
+
+
+def _make_store():
+    if RATE_LIMIT_STORE.startswith("sqlite:///"):
+        return SqliteTokenStore(RATE_LIMIT_STORE[len("sqlite:///"):])
+    return MemoryTokenStore()
+
+
+class TokenBucket:
+    """
+    Per-provider limiter. Waiters are queued as (priority, seq) and a single pump task
+    hands out tokens in that order as they become available.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float, store):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.store = store
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._pump_task: asyncio.Task | None = None
+        self.granted = 0
+        self.timed_out = 0
+
+    async def _take(self) -> float:
+        if isinstance(self.store, MemoryTokenStore):
+            return self.store.take(self.name, self.rate, self.burst)
+        return await asyncio.to_thread(self.store.take, self.name, self.rate, self.burst)
+
+    async def acquire(self, priority: int | None = None, timeout: float | None = None) -> None:
+        priority = _PRIORITY.get() if priority is None else priority
+        timeout = MAX_WAIT_SECONDS[priority] if timeout is None else timeout
+
+        # fast path: nobody queued and a token is available
+        if not self._waiters and await self._take() == 0:
+            self.granted += 1
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+        try:
+            await asyncio.wait_for(fut, timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise RateLimitTimeout(self.name) from None
+
+    async def _pump(self) -> None:
+        while self._waiters:
+            # drop waiters that timed out / were cancelled before spending a token on them
+            while self._waiters and self._waiters[0][2].done():
+                heapq.heappop(self._waiters)
+            if not self._waiters:
+                break
+            wait = await self._take()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            while self._waiters:
+                _, _, fut = heapq.heappop(self._waiters)
+                if not fut.done():
+                    fut.set_result(None)
+                    self.granted += 1
+                    break
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for `seconds` (e.g. after a 429 with Retry-After)."""
+        self.store.pause(self.name, seconds)
+
+    def snapshot(self) -> dict:
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "queued": sum(1 for _, _, f in self._waiters if not f.done()),
+            "granted": self.granted,
+            "timed_out": self.timed_out,
+        }
+
+
+def _provider_limit(name: str) -> tuple[float, float]:
+    profile = PROVIDERS[name]
+    key = name.upper()
+    rate = float(os.getenv(f"RATE_LIMIT_{key}_PER_SECOND", str(profile.rate_per_second)))
+    burst = float(os.getenv(f"RATE_LIMIT_{key}_BURST", str(profile.burst)))
+    return rate, burst
+
+
+_STORE = _make_store()
+BUCKETS = {name: TokenBucket(name, *_provider_limit(name), store=_STORE) for name in PROVIDERS}
+
+
+def get_bucket(provider: str) -> TokenBucket:
+    return BUCKETS[provider]
+
+
+def rate_limit_states() -> dict:
+    return {"store": RATE_LIMIT_STORE, **{name: b.snapshot() for name, b in BUCKETS.items()}}
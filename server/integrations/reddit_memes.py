@@ -1,6 +1,15 @@
-import time
+import asyncio
+import hashlib
+import os
 import random
-import httpx
+
+import config  # noqa: F401
+from integrations.breaker import get_breaker
+from integrations.cache import TTLCache
+from integrations.http_clients import get_client
+from integrations.rate_limit import BACKGROUND, outbound_priority
+
+BASE_URL = os.getenv("REDDIT_BASE_URL", "https://www.reddit.com")
 
 # Subreddits that frequently contain meme-y crypto content
 SUBREDDITS = [
@@ -9,32 +18,46 @@ SUBREDDITS = [
     "CryptoCurrency",
 ]
 
-# In-memory cache (process-local)
-_CACHE = {
-    "fetched_at": 0.0,
-    "posts": [],  # list[dict]
-}
-
 CACHE_TTL_SECONDS = 600  # 10 minutes
+# Past the TTL the old pool is still served for this long while one refresh runs
+MEME_STALE_SECONDS = int(os.getenv("MEME_STALE_SECONDS", "1800"))
+# The background prefetcher refreshes the pool this many seconds before it expires
+MEME_PREFETCH_LEAD_SECONDS = int(os.getenv("MEME_PREFETCH_LEAD_SECONDS", "60"))
+# ... plus up to this much more at random, so workers don't all wake at once
+MEME_PREFETCH_JITTER_SECONDS = int(os.getenv("MEME_PREFETCH_JITTER_SECONDS", "15"))
+MEME_PREFETCH_RETRY_SECONDS = 30
+# how long the worker refreshing a shared pool keeps the others off it
+MEME_PREFETCH_LEASE_SECONDS = 60
+
+# The merged post pool (list[dict]) under a single key; shared across workers when CACHE_BACKEND is
+_CACHE = TTLCache(
+    ttl_seconds=CACHE_TTL_SECONDS,
+    max_entries=1,
+    namespace="reddit.memes",
+    retain_seconds=CACHE_TTL_SECONDS + MEME_STALE_SECONDS,
+)
+_POOL_KEY = "posts"
+
+
+async def meme_cache_stats() -> dict:
+    return await _CACHE.stats()
+
 
 def _is_image_url(url: str) -> bool:
     u = (url or "").lower()
     return u.endswith(".jpg") or u.endswith(".jpeg") or u.endswith(".png") or u.endswith(".gif")
 
-async def _fetch_posts() -> list[dict]:
-    # pick a subreddit randomly to vary content
-    sub = random.choice(SUBREDDITS)
-    url = f"https://www.reddit.com/r/{sub}/hot.json?limit=50"
-
-    headers = {
-        # Reddit wants a meaningful UA; keep it simple
-        "User-Agent": "AI-Crypto-Advisor/1.0 (coding task; contact: none)",
-    }
+async def _fetch_posts(sub: str) -> list[dict]:
+    url = f"{BASE_URL}/r/{sub}/hot.json?limit=50"
 
-    async with httpx.AsyncClient(timeout=10) as client:
-        r = await client.get(url, headers=headers)
+    # User-Agent header comes from the shared "reddit" client profile
+    async def request():
+        r = await get_client("reddit").get(url)
         r.raise_for_status()
-        data = r.json()
+        return r.json()
+
+    # no fallback here: the previous pool keeps being served on failure
+    data = await get_breaker("reddit").call(request)
 
     children = (data.get("data") or {}).get("children") or []
     posts = []
@@ -77,26 +100,105 @@ async def _fetch_posts() -> list[dict]:
 
     return posts
 
-async def get_random_meme() -> dict:
-    now = time.time()
+async def _fetch_pool() -> list[dict]:
+    """Hot posts from all SUBREDDITS merged into one pool, de-duplicated by image URL."""
+    results = await asyncio.gather(*(_fetch_posts(sub) for sub in SUBREDDITS), return_exceptions=True)
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if len(errors) == len(results):
+        raise errors[0]
 
-    # refresh cache if needed
-    if (now - _CACHE["fetched_at"] > CACHE_TTL_SECONDS) or (not _CACHE["posts"]):
+    pool, seen = [], set()
+    for posts in results:
+        if isinstance(posts, BaseException):
+            continue
+        for post in posts:
+            if post["image_url"] not in seen:
+                seen.add(post["image_url"])
+                pool.append(post)
+    return pool
+
+
+def _has_posts(pool) -> bool:
+    return bool(pool)
+
+
+def _pick(posts: list[dict], view_key: str | None) -> dict:
+    if view_key is None:
+        return random.choice(posts)
+    # same pool + same key -> same meme, so a view can be revalidated (ETag) without a fetch
+    digest = hashlib.sha256(view_key.encode()).digest()
+    return posts[int.from_bytes(digest[:8], "big") % len(posts)]
+
+
+async def cached_meme(view_key: str) -> dict | None:
+    """What get_random_meme(view_key) returns right now if the pool is fresh in the cache; no Reddit call."""
+    posts = await _CACHE.get(_POOL_KEY)
+    return _pick(posts, view_key) if posts else None
+
+
+async def pooled_meme(image_url: str | None) -> dict | None:
+    """The post with this image in the current (or stale) pool, or None; no Reddit call."""
+    if not image_url:
+        return None
+    for post in await _CACHE.peek(_POOL_KEY) or []:
+        if post["image_url"] == image_url:
+            return post
+    return None
+
+
+async def get_random_meme(view_key: str | None = None) -> dict:
+    """
+    A meme from the merged pool: random, or fixed per `view_key` (e.g. user and day)
+    for as long as the pool stays the same.
+    """
+    # Fresh pool: served from cache. Expired but within MEME_STALE_SECONDS: served as-is
+    # while one background refresh runs. Missing: concurrent callers share one fetch.
+    try:
+        posts = await _CACHE.get_or_fetch(
+            _POOL_KEY, _fetch_pool, stale_ttl_seconds=MEME_STALE_SECONDS, should_cache=_has_posts
+        )
+    except Exception:
+        # Don't break dashboard if Reddit blocks/rate-limits temporarily
+        posts = None
+
+    if not posts:
+        # fallback to last cached
+        posts = await _CACHE.peek(_POOL_KEY)
+    if not posts:
+        return {
+            "title": "Meme unavailable (Reddit fetch failed)",
+            "image_url": None,
+            "post_url": None,
+            "subreddit": None,
+            "source": "reddit",
+        }
+
+    return _pick(posts, view_key)
+
+
+async def prefetch_memes() -> None:
+    """
+    Background loop (started from the app lifespan): refresh the pool shortly before
+    it expires so no request pays the Reddit latency. With a shared cache backend, the
+    pool's age is shared and each refresh is claimed with a lease in the backend, so
+    one worker refreshes it and the others see the new pool.
+    """
+    jitter = random.uniform(0, MEME_PREFETCH_JITTER_SECONDS)
+    while True:
+        age = await _CACHE.age(_POOL_KEY)
+        wait = 0.0 if age is None else CACHE_TTL_SECONDS - MEME_PREFETCH_LEAD_SECONDS - jitter - age
+        if wait > 0:
+            await asyncio.sleep(wait)
+            continue
+        jitter = random.uniform(0, MEME_PREFETCH_JITTER_SECONDS)
+        if not await _CACHE.acquire_lease(_POOL_KEY, MEME_PREFETCH_LEASE_SECONDS):
+            # another worker is refreshing it
+            await asyncio.sleep(MEME_PREFETCH_RETRY_SECONDS)
+            continue
         try:
-            _CACHE["posts"] = await _fetch_posts()
-            _CACHE["fetched_at"] = now
+            with outbound_priority(BACKGROUND):
+                pool = await _CACHE.refresh(_POOL_KEY, _fetch_pool, should_cache=_has_posts)
         except Exception:
-            # Don't break dashboard if Reddit blocks/rate-limits temporarily
-            if _CACHE["posts"]:
-                # fallback to last cached
-                pass
-            else:
-                return {
-                    "title": "Meme unavailable (Reddit fetch failed)",
-                    "image_url": None,
-                    "post_url": None,
-                    "subreddit": None,
-                    "source": "reddit",
-                }
-
-    return random.choice(_CACHE["posts"])
+            pool = None
+        if not pool:
+            await asyncio.sleep(MEME_PREFETCH_RETRY_SECONDS)
@@ -1,23 +1,91 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from auth_routes import router as auth_router
 from preferences_routes import router as preferences_router
 from me_routes import router as me_router
 from votes_routes import router as votes_router
-from dev_routes import router as dev_router
 from dashboard_routes import router as dashboard_router
-from dotenv import load_dotenv
-from alembic.config import Config
-from alembic import command
+from analytics_routes import router as analytics_router
+from integrations.http_clients import open_clients, close_clients, connection_stats
+from integrations.coingecko import price_cache_stats
+from integrations.cryptopanic import news_cache_stats
+from integrations.hf_ai import insight_cache_stats
+from integrations.reddit_memes import meme_cache_stats, prefetch_memes
+from integrations.breaker import breaker_states
+from integrations.rate_limit import rate_limit_states
+from db import async_engine, engine
+from payload_store import payload_cache_stats
+import metrics
+from auth_utils import shutdown_hash_executor
+from config import APP_ENV
+import asyncio
 import os
 
 
+# Migrations run out of band (python migrate.py). At boot workers only check the
+# schema version: "warn" (default) logs a mismatch, "strict" refuses to start, "off" skips.
+SCHEMA_CHECK = os.getenv("SCHEMA_CHECK", "warn")
+# local dev convenience only; never enable with several workers
+RUN_MIGRATIONS_ON_STARTUP = os.getenv("RUN_MIGRATIONS_ON_STARTUP") == "1"
+
+
+def verify_schema():
+    import migrate
+
+    if RUN_MIGRATIONS_ON_STARTUP:
+        migrate.upgrade()
+    if SCHEMA_CHECK == "off":
+        return
+
+    ok, current, expected = migrate.check_schema(engine)
+    if ok:
+        return
+    message = (
+        f"Database schema is at {sorted(current) or 'no revision'}, code expects {sorted(expected)}. "
+        "Run `python migrate.py` before starting the app."
+    )
+    if SCHEMA_CHECK == "strict":
+        raise RuntimeError(message)
+    print("WARNING:", message)
+
 
-load_dotenv()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await asyncio.to_thread(verify_schema)
+    await open_clients()
 
+    meme_prefetch_task = None
+    if os.getenv("MEME_PREFETCH", "1") == "1":
+        meme_prefetch_task = asyncio.create_task(prefetch_memes())
 
+    warmup_task = None
+    warmup_at = os.getenv("DASHBOARD_WARMUP_AT")
+    if warmup_at:
+        from warmup import run_daily
+        warmup_task = asyncio.create_task(run_daily(warmup_at))
 
-app = FastAPI()
+    yield
+
+    if warmup_task:
+        warmup_task.cancel()
+    if meme_prefetch_task:
+        meme_prefetch_task.cancel()
+        # let an in-flight refresh unwind before its client is closed
+        await asyncio.gather(meme_prefetch_task, return_exceptions=True)
+    await close_clients()
+    await async_engine.dispose()
+    shutdown_hash_executor()
+
+
+app = FastAPI(lifespan=lifespan)
+
+metrics.instrument_engine(async_engine.sync_engine)
+# sync routes (/me, /preferences, dev) use the sync engine
+metrics.instrument_engine(engine)
+app.add_middleware(metrics.MetricsMiddleware)
 
 
 app.add_middleware(
@@ -36,19 +104,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def run_migrations():
-    alembic_cfg = Config("alembic.ini")
-    command.upgrade(alembic_cfg, "head")
+@app.get("/health")
+def health():
+    return {"status": "ok"}
 
 
-@app.on_event("startup")
-async def startup_event():
-    run_migrations()
+@app.get("/health/http")
+def health_http():
+    # connection reuse per upstream provider (new_connections should stay flat under load)
+    return connection_stats()
 
 
-@app.get("/health")
-def health():
-    return {"status": "ok"}
+@app.get("/health/breakers")
+def health_breakers():
+    # per-provider circuit state, error rate, observed latency and current adaptive timeout
+    return breaker_states()
+
+
+@app.get("/health/rate-limits")
+def health_rate_limits():
+    # outbound token buckets: configured rate/burst, queued waiters, granted / timed-out counts
+    return rate_limit_states()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    # Prometheus text exposition format; per worker process
+    return PlainTextResponse(await metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/health/caches")
+async def health_caches():
+    # shared integration caches: hits/misses per cache
+    return {
+        "prices": await price_cache_stats(),
+        "news": await news_cache_stats(),
+        "ai": await insight_cache_stats(),
+        "memes": await meme_cache_stats(),
+        "payloads": await payload_cache_stats(),
+    }
 
 
 app.include_router(auth_router)
@@ -59,6 +153,11 @@ app.include_router(me_router)
 
 app.include_router(votes_router)
 
-app.include_router(dev_router)
+# Dev-only helpers; imported only when enabled so production workers skip them
+if os.getenv("ENABLE_DEV_ROUTES", "1" if APP_ENV != "production" else "0") == "1":
+    from dev_routes import router as dev_router
+    app.include_router(dev_router)
 
 app.include_router(dashboard_router)
+
+app.include_router(analytics_router)
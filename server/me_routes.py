@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.orm import Session
 
 from db import get_db
-from deps import get_current_user
-from models import Preferences, User
+from deps import CurrentUser, get_current_principal
+from etags import if_none_match, make_etag, not_modified, set_etag
+from models import Preferences
 from schemas import MeResponse
 
 router = APIRouter(prefix="/me", tags=["me"])
@@ -11,7 +12,9 @@ router = APIRouter(prefix="/me", tags=["me"])
 
 @router.get("", response_model=MeResponse)
 def get_me(
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     has_prefs = (
@@ -21,6 +24,10 @@ def get_me(
         is not None
     )
 
+    etag = make_etag("me", current_user.id, current_user.email, current_user.name, has_prefs)
+    if if_none_match(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     return MeResponse(
         id=current_user.id,
         email=current_user.email,
@@ -0,0 +1,177 @@
+"""
+In-process metrics in the Prometheus text exposition format (GET /metrics).
+
+- MetricsMiddleware: per-route latency histogram and DB queries per request.
+- stage(name): times a step of the request pipeline (auth, DB load, fetch, commit, ...).
+- observe_integration(): upstream call timers per provider and outcome (from the breaker).
+- Integration cache hit/miss counters are read from the TTLCache instances at scrape time.
+
+Everything is plain dicts updated on the event loop, so recording a sample costs a
+bisect and a few increments; nothing is sent anywhere. Each worker has its own
+numbers, so with several workers scrape each one (or run a single worker).
+"""
+import bisect
+import contextlib
+import contextvars
+import time
+
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.label_names = name, help, labels
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name, self.help, self.label_names, self.buckets = name, help, labels, buckets
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by route template", ("method", "route", "status")
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per request", ("method", "route"), COUNT_BUCKETS
+)
+STAGE_LATENCY = Histogram("request_stage_duration_seconds", "Time spent per request pipeline stage", ("stage",))
+INTEGRATION_LATENCY = Histogram(
+    "integration_call_duration_seconds", "Upstream provider calls", ("provider", "outcome")
+)
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed (all callers)")
+
+_METRICS = [REQUEST_LATENCY, REQUEST_DB_QUERIES, STAGE_LATENCY, INTEGRATION_LATENCY, DB_QUERIES]
+
+# Mutable per-request counter; set by the middleware, bumped by the SQLAlchemy hook.
+_REQUEST_QUERIES: contextvars.ContextVar[list | None] = contextvars.ContextVar("request_queries", default=None)
+
+
+@contextlib.contextmanager
+def stage(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, name)
+
+
+def observe_integration(provider: str, outcome: str, seconds: float) -> None:
+    INTEGRATION_LATENCY.observe(seconds, provider, outcome)
+
+
+def _count_query(*args) -> None:
+    DB_QUERIES.inc()
+    counter = _REQUEST_QUERIES.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def instrument_engine(engine) -> None:
+    """Count statements on a (sync) Engine; for an AsyncEngine pass .sync_engine."""
+    event.listen(engine, "before_cursor_execute", _count_query)
+
+
+class MetricsMiddleware:
+    """Plain ASGI middleware (no BaseHTTPMiddleware) so streaming responses pass through untouched."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        queries = [0]
+        token = _REQUEST_QUERIES.set(queries)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _REQUEST_QUERIES.reset(token)
+            route = scope.get("route")
+            # route template keeps label cardinality bounded (/votes/{id}, not /votes/17)
+            path = getattr(route, "path", None) or "unmatched"
+            REQUEST_LATENCY.observe(time.perf_counter() - start, scope["method"], path, status[0])
+            REQUEST_DB_QUERIES.observe(queries[0], scope["method"], path)
+
+
+async def _cache_lines() -> list[str]:
+    from integrations.cache import TTLCache
+
+    lines = [
+        "# HELP integration_cache_requests_total Integration cache lookups by result",
+        "# TYPE integration_cache_requests_total counter",
+    ]
+    sizes = [
+        "# HELP integration_cache_entries Entries currently stored per integration cache",
+        "# TYPE integration_cache_entries gauge",
+    ]
+    for cache in sorted(TTLCache.instances(), key=lambda c: c.name):
+        name = _escape(cache.name)
+        for result, value in (("hit", cache.hits), ("stale", cache.stale_hits), ("miss", cache.misses)):
+            lines.append(f'integration_cache_requests_total{{cache="{name}",result="{result}"}} {value}')
+        sizes.append(f'integration_cache_entries{{cache="{name}"}} {await cache.backend.size()}')
+    return lines + sizes
+
+
+async def render() -> str:
+    lines = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    lines.extend(await _cache_lines())
+    return "\n".join(lines) + "\n"
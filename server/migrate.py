@@ -0,0 +1,89 @@
+"""
+Database migrations as an explicit deploy / pre-start step.
+
+App workers never run migrations themselves; at boot they only compare the
+database's alembic revision with the code's head (see check_schema).
+
+    python migrate.py             # upgrade to head
+    python migrate.py upgrade REV
+    python migrate.py check       # exit code 1 if the DB is not at head
+    python migrate.py current
+"""
+import os
+import re
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+VERSIONS_DIR = os.path.join(HERE, "alembic", "versions")
+
+_REVISION_RE = re.compile(r"^revision(?:\s*:\s*[^=]+)?\s*=\s*['\"]([^'\"]+)['\"]", re.M)
+_DOWN_REVISION_RE = re.compile(r"^down_revision(?:\s*:\s*[^=]+)?\s*=\s*(.+)$", re.M)
+
+
+def alembic_config():
+    from alembic.config import Config
+    return Config(os.path.join(HERE, "alembic.ini"))
+
+
+def upgrade(revision: str = "head") -> None:
+    from alembic import command
+    command.upgrade(alembic_config(), revision)
+
+
+def expected_heads() -> set[str]:
+    """
+    Head revision(s) of the migration scripts. Reads the `revision` / `down_revision`
+    lines directly instead of importing alembic, which keeps the boot-time check cheap.
+    """
+    revisions, parents = set(), set()
+    for name in os.listdir(VERSIONS_DIR):
+        if not name.endswith(".py"):
+            continue
+        with open(os.path.join(VERSIONS_DIR, name), encoding="utf-8") as f:
+            source = f.read()
+        rev = _REVISION_RE.search(source)
+        if not rev:
+            continue
+        revisions.add(rev.group(1))
+        down = _DOWN_REVISION_RE.search(source)
+        if down:
+            parents.update(re.findall(r"['\"]([^'\"]+)['\"]", down.group(1)))
+    return revisions - parents
+
+
+def current_heads(engine) -> set[str]:
+    from sqlalchemy import inspect, text
+
+    with engine.connect() as connection:
+        if not inspect(connection).has_table("alembic_version"):
+            return set()
+        return set(connection.execute(text("SELECT version_num FROM alembic_version")).scalars())
+
+
+def check_schema(engine) -> tuple[bool, set[str], set[str]]:
+    """(up_to_date, current, expected); one small query against alembic_version."""
+    current, expected = current_heads(engine), expected_heads()
+    return current == expected, current, expected
+
+
+def main(argv: list[str]) -> int:
+    cmd = argv[0] if argv else "upgrade"
+    if cmd == "upgrade":
+        upgrade(argv[1] if len(argv) > 1 else "head")
+        return 0
+
+    from db import engine
+    if cmd == "check":
+        ok, current, expected = check_schema(engine)
+        print(f"current={sorted(current)} expected={sorted(expected)}")
+        return 0 if ok else 1
+    if cmd == "current":
+        print(sorted(current_heads(engine)))
+        return 0
+
+    print(__doc__)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
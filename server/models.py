@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, UniqueConstraint, JSON
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, UniqueConstraint, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -36,12 +36,26 @@ class Preferences(Base):
     user = relationship("User", back_populates="preferences")
 
 
+class Payload(Base):
+    """Dashboard item content, stored once per distinct body and referenced by its hash."""
+
+    __tablename__ = "payloads"
+
+    # sha256 of the canonical JSON encoding (see payload_store.payload_hash)
+    hash = Column(String(64), primary_key=True)
+    body = Column(JSON, nullable=False)
+
+    # bumped whenever a writer (re)stores this body; cleanup keeps recently written rows
+    last_written_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
 class DashboardItem(Base):
     __tablename__ = "dashboard_items"
 
     id = Column(Integer, primary_key=True)
 
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # indexed via ix_dashboard_items_user_date below
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
 
     # ensures "daily" caching
     date = Column(Date, nullable=False, index=True)
@@ -49,8 +63,13 @@ class DashboardItem(Base):
     # one of: news, prices, ai, meme
     item_type = Column(String(20), nullable=False)
 
-    # store actual content payload (news object, prices dict, insight text, meme URL, etc.)
-    payload = Column(JSON, nullable=False)
+    # content payload (news object, prices dict, insight text, meme URL, etc.), shared across
+    # users by content hash; indexed for reference-aware cleanup (payload_store.collect_garbage)
+    payload_hash = Column(String(64), ForeignKey("payloads.hash"), nullable=False, index=True)
+
+    # Resolved body of payload_hash. Not a column: filled in by payload_store.attach_payloads()
+    # on load and by stage_payload() on write.
+    payload = None
 
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
@@ -60,6 +79,8 @@ class DashboardItem(Base):
     __table_args__ = (
         # at most one item per user per day per type (news/prices/ai/meme)
         UniqueConstraint("user_id", "date", "item_type", name="uq_user_date_itemtype"),
+        # per-user date-range scans (history); covering on Postgres
+        Index("ix_dashboard_items_user_date", "user_id", "date", "id", postgresql_include=["item_type"]),
     )
 
 
@@ -73,6 +94,8 @@ class Vote(Base):
 
     # +1 for thumbs up, -1 for thumbs down
     value = Column(Integer, nullable=False)
+    # value before the last re-vote (NULL until then); lets the upsert report flips to the rollups
+    previous_value = Column(Integer, nullable=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
@@ -83,3 +106,17 @@ class Vote(Base):
         # one vote per user per dashboard item (you can update it instead)
         UniqueConstraint("user_id", "dashboard_item_id", name="uq_user_dashboard_item_vote"),
     )
+
+
+class VoteRollup(Base):
+    """Vote counters per dashboard day, item type and voter investor type (see vote_rollups.py)."""
+
+    __tablename__ = "vote_rollups"
+
+    day = Column(Date, primary_key=True)
+    item_type = Column(String(20), primary_key=True)
+    # voter's current Preferences.investor_type, "unknown" before preferences are set
+    investor_type = Column(String(50), primary_key=True)
+
+    up = Column(Integer, nullable=False, default=0)
+    down = Column(Integer, nullable=False, default=0)
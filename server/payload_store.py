@@ -0,0 +1,214 @@
+"""
+Content-addressed storage for dashboard item payloads.
+
+Most payloads are byte-identical across users (same prices, same top story, same meme),
+so each distinct body is stored once in `payloads`, keyed by the sha256 of its canonical
+JSON, and `dashboard_items.payload_hash` points at it. Bodies never change for a given
+hash, so they're cached in memory by hash without invalidation.
+
+Write path: stage items with their hash, then store_payloads() upserts the bodies this
+worker hasn't written recently, in the same transaction.
+Read path: attach_payloads() fills item.payload from the cache, with one query for misses.
+
+Cleanup (payloads no item references any more, e.g. after users are deleted):
+
+    python payload_store.py gc [--grace-hours 24] [--batch-size 1000]
+
+--grace-hours may be raised but not lowered below PAYLOAD_GC_GRACE_HOURS, which must
+match the workers' value (they skip re-writing bodies for half of it).
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable
+
+from sqlalchemy import delete, event, exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from db import dialect_insert
+from integrations.cache import TTLCache
+from integrations.cache_backends import MemoryBackend
+from models import DashboardItem, Payload
+
+PAYLOAD_CACHE_MAX_ENTRIES = int(os.getenv("PAYLOAD_CACHE_MAX_ENTRIES", "10000"))
+# Unreferenced payloads written within this window are kept by cleanup.
+PAYLOAD_GC_GRACE_HOURS = float(os.getenv("PAYLOAD_GC_GRACE_HOURS", "24"))
+
+# hash -> body for reads; bodies are immutable, the TTL only bounds how long a cold one stays.
+# Always in-process: a shared backend would cost a round trip to save one indexed lookup.
+_CACHE = TTLCache(
+    ttl_seconds=24 * 60 * 60,
+    namespace="payloads.bodies",
+    backend=MemoryBackend(PAYLOAD_CACHE_MAX_ENTRIES),
+)
+# hashes this worker upserted recently. Shorter than the GC grace, so skipping the upsert
+# for these never leaves an item pointing at a row cleanup is allowed to remove.
+_WRITTEN = TTLCache(
+    ttl_seconds=PAYLOAD_GC_GRACE_HOURS * 3600 / 2,
+    namespace="payloads.written",
+    backend=MemoryBackend(PAYLOAD_CACHE_MAX_ENTRIES),
+)
+# hash -> body of payloads committed since the caches were last updated. Filled by the
+# (sync) after_commit listener; the next async caller moves them into the caches.
+_COMMITTED: dict[str, Any] = {}
+
+
+def payload_hash(body: Any) -> str:
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+async def payload_cache_stats() -> dict:
+    await _apply_committed()
+    return await _CACHE.stats()
+
+
+async def _apply_committed() -> None:
+    while _COMMITTED:
+        h, body = _COMMITTED.popitem()
+        await _WRITTEN.set(h, True)
+        await _CACHE.set(h, body)
+
+
+async def store_payloads(db: AsyncSession, bodies: Iterable[Any]) -> list[str]:
+    """
+    Make sure a `payloads` row exists for each body (in the caller's transaction) and
+    return their hashes in order. Existing rows only get last_written_at bumped, and
+    bodies this worker wrote within the last half grace period are skipped entirely.
+    """
+    bodies = list(bodies)
+    hashes = [payload_hash(b) for b in bodies]
+    await _apply_committed()
+    new = {h: b for h, b in zip(hashes, bodies) if await _WRITTEN.get(h) is None}
+    if new:
+        insert = dialect_insert(db)
+        await db.execute(
+            insert(Payload)
+            .values([{"hash": h, "body": b} for h, b in new.items()])
+            .on_conflict_do_update(index_elements=["hash"], set_={"last_written_at": func.now()})
+        )
+        # remembered once the transaction commits (see _remember_committed below)
+        db.sync_session.info.setdefault("new_payloads", {}).update(new)
+    return hashes
+
+
+def store_payload_sync(db: Session, body: Any) -> str:
+    """store_payloads() for sync sessions (dev routes, seed scripts); always upserts."""
+    h = payload_hash(body)
+    db.execute(
+        dialect_insert(db)(Payload)
+        .values(hash=h, body=body)
+        .on_conflict_do_update(index_elements=["hash"], set_={"last_written_at": func.now()})
+    )
+    return h
+
+
+async def load_payloads(db: AsyncSession, hashes: Iterable[str]) -> dict[str, Any]:
+    await _apply_committed()
+    out, missing = {}, set()
+    for h in set(hashes):
+        body = await _CACHE.get(h)
+        if body is None:
+            missing.add(h)
+        else:
+            out[h] = body
+    if missing:
+        rows = await db.execute(select(Payload.hash, Payload.body).where(Payload.hash.in_(missing)))
+        for h, body in rows:
+            await _CACHE.set(h, body)
+            out[h] = body
+    return out
+
+
+async def attach_payloads(db: AsyncSession, items: Iterable[DashboardItem]) -> None:
+    """Fill item.payload for loaded items (one query at most, none when all bodies are cached)."""
+    items = [i for i in items if i is not None and i.payload is None]
+    if not items:
+        return
+    bodies = await load_payloads(db, (i.payload_hash for i in items))
+    for i in items:
+        i.payload = bodies.get(i.payload_hash)
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_committed(session: Session) -> None:
+    _COMMITTED.update(session.info.pop("new_payloads", {}))
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_uncommitted(session: Session) -> None:
+    session.info.pop("new_payloads", None)
+
+
+async def collect_garbage(
+    db: AsyncSession,
+    grace: timedelta = timedelta(hours=PAYLOAD_GC_GRACE_HOURS),
+    batch_size: int = 1000,
+) -> int:
+    """
+    Delete payloads no dashboard item references, in batches that commit independently.
+    Each DELETE re-checks the reference, so an item inserted meanwhile keeps its payload.
+
+    `grace` can't be shorter than PAYLOAD_GC_GRACE_HOURS: workers skip the upsert for
+    bodies they wrote within half of it (_WRITTEN), and new items referencing a body
+    deleted in that window would fail their foreign key.
+    """
+    if grace < timedelta(hours=PAYLOAD_GC_GRACE_HOURS):
+        raise ValueError(f"grace must be at least PAYLOAD_GC_GRACE_HOURS ({PAYLOAD_GC_GRACE_HOURS}h)")
+    cutoff = datetime.now(timezone.utc) - grace
+    unreferenced = ~exists().where(DashboardItem.payload_hash == Payload.hash)
+    deleted, after = 0, ""
+    while True:
+        batch = (
+            await db.execute(
+                select(Payload.hash)
+                .where(Payload.hash > after, Payload.last_written_at < cutoff, unreferenced)
+                .order_by(Payload.hash)
+                .limit(batch_size)
+            )
+        ).scalars().all()
+        if not batch:
+            break
+        after = batch[-1]
+        result = await db.execute(
+            delete(Payload)
+            .where(Payload.hash.in_(batch), Payload.last_written_at < cutoff, unreferenced)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        deleted += max(result.rowcount or 0, 0)
+        await _apply_committed()
+        for h in batch:
+            await _CACHE.delete(h)
+            await _WRITTEN.delete(h)
+    return deleted
+
+
+async def _main(args) -> None:
+    from db import AsyncSessionLocal, async_engine
+
+    try:
+        async with AsyncSessionLocal() as db:
+            deleted = await collect_garbage(db, timedelta(hours=args.grace_hours), args.batch_size)
+        print(f"deleted {deleted} unreferenced payloads")
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Content-addressed payload maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    gc = sub.add_parser("gc", help="delete payloads no dashboard item references")
+    gc.add_argument(
+        "--grace-hours", type=float, default=PAYLOAD_GC_GRACE_HOURS,
+        help="keep bodies written this recently; not below PAYLOAD_GC_GRACE_HOURS (the workers' setting)",
+    )
+    gc.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    if args.grace_hours < PAYLOAD_GC_GRACE_HOURS:
+        parser.error(f"--grace-hours must be at least PAYLOAD_GC_GRACE_HOURS ({PAYLOAD_GC_GRACE_HOURS})")
+    asyncio.run(_main(args))
@@ -1,17 +1,21 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, Response, status
 from sqlalchemy.orm import Session
 
 from db import get_db
-from deps import get_current_user
-from models import Preferences, User
+from deps import CurrentUser, get_current_principal
+from etags import if_none_match, make_etag, not_modified, set_etag
+from models import Preferences
 from schemas import PreferencesUpsertRequest, PreferencesResponse
+from vote_rollups import move_user_votes
 
 router = APIRouter(prefix="/preferences", tags=["preferences"])
 
 
 @router.get("", response_model=PreferencesResponse)
 def get_preferences(
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     prefs = db.query(Preferences).filter(Preferences.user_id == current_user.id).first()
@@ -20,6 +24,13 @@ def get_preferences(
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Preferences not set")
 
+    # updated_at alone can repeat within a second on SQLite; the fields are already loaded
+    etag = make_etag(
+        "preferences", current_user.id, prefs.updated_at, prefs.assets, prefs.investor_type, prefs.content_types
+    )
+    if if_none_match(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     return PreferencesResponse(
         assets=prefs.assets,
         investor_type=prefs.investor_type,
@@ -30,10 +41,12 @@ def get_preferences(
 @router.post("", response_model=PreferencesResponse, status_code=status.HTTP_200_OK)
 def upsert_preferences(
     payload: PreferencesUpsertRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     prefs = db.query(Preferences).filter(Preferences.user_id == current_user.id).first()
+    # vote rollups count votes under the voter's current investor type
+    move_user_votes(db, current_user.id, prefs.investor_type if prefs else None, payload.investor_type)
 
     if not prefs:
         prefs = Preferences(
@@ -0,0 +1,257 @@
+"""
+Date-based retention for dashboard_items and votes.
+
+Items older than RETENTION_DAYS move, together with their votes, out of the database
+into gzipped NDJSON under ARCHIVE_DIR, partitioned by month and by user shard:
+
+    archive/dashboard_items/2026-03/part-005-of-016.ndjson.gz
+
+One line per item with the payload body and votes inline, so archives don't depend on
+the payloads table. Rows move in bounded batches (lock the oldest N plus the rest of the
+last user's day, append them to the archive files and fsync, delete, commit, pause), so
+the hot tables are only ever locked for one small batch and a user's day moves whole.
+A crash between the file write and the commit re-archives that batch on the next run;
+readers de-duplicate by item id.
+
+Archived days stay readable through GET /dashboard/history?include_archived=true
+(read_archived_days). Once items are archived, `python payload_store.py gc` drops the
+bodies nothing references any more. CLI (e.g. nightly from cron):
+
+    python retention.py archive [--days 90] [--batch-size 1000] [--pause 0.05]
+    python retention.py show --user-id 42 [--start 2026-01-01] [--end 2026-03-31]
+"""
+import argparse
+import asyncio
+import glob
+import gzip
+import json
+import os
+import re
+from datetime import date, timedelta
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import DashboardItem, Payload, Vote
+
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", "90"))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive")
+# Files per month; each user's lines land in part user_id % shards. Safe to change between
+# runs: the shard count is part of the file name, and readers check every layout.
+ARCHIVE_SHARDS = int(os.getenv("ARCHIVE_SHARDS", "16"))
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "1000"))
+# sleep between batches so interactive writers get the write lock in between
+RETENTION_BATCH_PAUSE_SECONDS = float(os.getenv("RETENTION_BATCH_PAUSE_SECONDS", "0.05"))
+
+_PART_RE = re.compile(r"part-(\d+)-of-(\d+)\.ndjson\.gz$")
+
+
+def retention_cutoff(days: int = RETENTION_DAYS, today: date | None = None) -> date:
+    """Oldest date kept in the database."""
+    return (today or date.today()) - timedelta(days=days)
+
+
+def _items_dir() -> str:
+    return os.path.join(ARCHIVE_DIR, "dashboard_items")
+
+
+def _append(path: str, lines: list[str]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "ab") as f:
+        # every append is a complete gzip member; gzip readers see the concatenation
+        with gzip.GzipFile(fileobj=f, mode="wb") as gz:
+            gz.write("".join(lines).encode())
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def write_archive(records: list[dict], shards: int = ARCHIVE_SHARDS) -> None:
+    parts: dict[str, list[str]] = {}
+    for r in records:
+        name = f"part-{r['user_id'] % shards:03d}-of-{shards:03d}.ndjson.gz"
+        path = os.path.join(_items_dir(), r["date"][:7], name)
+        parts.setdefault(path, []).append(json.dumps(r, separators=(",", ":"), default=str) + "\n")
+    for path, lines in parts.items():
+        _append(path, lines)
+
+
+async def _load_batch(db: AsyncSession, cutoff: date, batch_size: int) -> list[dict]:
+    columns = select(
+        DashboardItem.id,
+        DashboardItem.user_id,
+        DashboardItem.date,
+        DashboardItem.item_type,
+        DashboardItem.payload_hash,
+        DashboardItem.created_at,
+    )
+    items = (
+        await db.execute(
+            columns.where(DashboardItem.date < cutoff)
+            .order_by(DashboardItem.date, DashboardItem.user_id, DashboardItem.id)
+            .limit(batch_size)
+            # Postgres: a vote on one of these items waits for the batch, then sees it gone
+            .with_for_update()
+        )
+    ).all()
+    if not items:
+        return []
+    if len(items) == batch_size:
+        # finish the last user's day, so history never finds a day half here, half archived
+        last = items[-1]
+        items += (
+            await db.execute(
+                columns.where(
+                    DashboardItem.date == last.date,
+                    DashboardItem.user_id == last.user_id,
+                    DashboardItem.id > last.id,
+                )
+                .order_by(DashboardItem.id)
+                .with_for_update()
+            )
+        ).all()
+
+    votes: dict[int, list[dict]] = {}
+    rows = await db.execute(
+        select(Vote.dashboard_item_id, Vote.user_id, Vote.value, Vote.created_at)
+        .where(Vote.dashboard_item_id.in_([i.id for i in items]))
+    )
+    for v in rows:
+        votes.setdefault(v.dashboard_item_id, []).append(
+            {"user_id": v.user_id, "value": v.value, "created_at": v.created_at}
+        )
+    # straight from the table: old bodies shouldn't displace hot ones in the payload cache
+    bodies = dict(
+        (await db.execute(
+            select(Payload.hash, Payload.body).where(Payload.hash.in_({i.payload_hash for i in items}))
+        )).all()
+    )
+    return [
+        {
+            "id": i.id,
+            "user_id": i.user_id,
+            "date": i.date.isoformat(),
+            "item_type": i.item_type,
+            "payload": bodies.get(i.payload_hash),
+            "created_at": i.created_at,
+            "votes": votes.get(i.id, []),
+        }
+        for i in items
+    ]
+
+
+async def archive_expired(
+    db: AsyncSession,
+    cutoff: date,
+    batch_size: int = RETENTION_BATCH_SIZE,
+    pause: float = RETENTION_BATCH_PAUSE_SECONDS,
+    shards: int = ARCHIVE_SHARDS,
+) -> dict:
+    """Move items dated before `cutoff` (and their votes) to the archive, one batch per transaction."""
+    stats = {"items": 0, "votes": 0, "batches": 0}
+    while True:
+        records = await _load_batch(db, cutoff, batch_size)
+        if not records:
+            await db.rollback()
+            break
+        await asyncio.to_thread(write_archive, records, shards)
+
+        ids = [r["id"] for r in records]
+        await db.execute(
+            delete(Vote).where(Vote.dashboard_item_id.in_(ids)).execution_options(synchronize_session=False)
+        )
+        await db.execute(
+            delete(DashboardItem).where(DashboardItem.id.in_(ids)).execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+        stats["items"] += len(records)
+        stats["votes"] += sum(len(r["votes"]) for r in records)
+        stats["batches"] += 1
+        if pause:
+            await asyncio.sleep(pause)
+    return stats
+
+
+def _user_parts(month_dir: str, user_id: int) -> list[str]:
+    paths = []
+    for path in glob.glob(os.path.join(month_dir, "part-*-of-*.ndjson.gz")):
+        m = _PART_RE.search(path)
+        if m and user_id % int(m.group(2)) == int(m.group(1)):
+            paths.append(path)
+    return paths
+
+
+def read_archived_days(
+    user_id: int,
+    start: date | None,
+    end: date,
+    before: date | None,
+    days: int,
+) -> list[tuple[date, list[dict]]]:
+    """
+    The newest `days` + 1 archived dates for a user in [start, end] older than `before`
+    (same window as dashboard_routes.history_query), newest first, items in id order.
+    Reads whole month parts, so this is blocking file I/O: call it from a thread.
+    """
+    root = _items_dir()
+    if not os.path.isdir(root):
+        return []
+    newest = end if before is None else min(end, before - timedelta(days=1))
+    marker = f'"user_id":{user_id},'
+
+    by_day: dict[date, dict[int, dict]] = {}
+    for month in sorted(os.listdir(root), reverse=True):
+        if len(by_day) > days or (start is not None and month < start.isoformat()[:7]):
+            break
+        if month > newest.isoformat()[:7]:
+            continue
+        for path in _user_parts(os.path.join(root, month), user_id):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if marker not in line:  # skip other users without parsing
+                        continue
+                    r = json.loads(line)
+                    day = date.fromisoformat(r["date"])
+                    if r["user_id"] != user_id or day > newest or (start is not None and day < start):
+                        continue
+                    # keyed by id: a batch re-archived after a crash is in the file twice
+                    by_day.setdefault(day, {})[r["id"]] = r
+
+    newest_days = sorted(by_day, reverse=True)[: days + 1]
+    return [(day, sorted(by_day[day].values(), key=lambda r: r["id"])) for day in newest_days]
+
+
+async def _main(args) -> None:
+    if args.command == "show":
+        end = date.fromisoformat(args.end) if args.end else date.today()
+        start = date.fromisoformat(args.start) if args.start else None
+        for day, records in read_archived_days(args.user_id, start, end, None, args.limit)[: args.limit]:
+            for r in records:
+                print(json.dumps(r))
+        return
+
+    from db import AsyncSessionLocal, async_engine
+
+    cutoff = retention_cutoff(args.days)
+    try:
+        async with AsyncSessionLocal() as db:
+            stats = await archive_expired(db, cutoff, args.batch_size, args.pause, args.shards)
+        print(f"archived before {cutoff}:", stats)
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dashboard history retention and archive")
+    sub = parser.add_subparsers(dest="command", required=True)
+    archive = sub.add_parser("archive", help="move items older than the retention window to the archive")
+    archive.add_argument("--days", type=int, default=RETENTION_DAYS, help="days kept in the database")
+    archive.add_argument("--batch-size", type=int, default=RETENTION_BATCH_SIZE)
+    archive.add_argument("--pause", type=float, default=RETENTION_BATCH_PAUSE_SECONDS, help="seconds between batches")
+    archive.add_argument("--shards", type=int, default=ARCHIVE_SHARDS)
+    show = sub.add_parser("show", help="print a user's archived items as NDJSON, newest day first")
+    show.add_argument("--user-id", type=int, required=True)
+    show.add_argument("--start", help="oldest date (YYYY-MM-DD)")
+    show.add_argument("--end", help="newest date (YYYY-MM-DD), default today")
+    show.add_argument("--limit", type=int, default=30, help="max days")
+    asyncio.run(_main(parser.parse_args()))
@@ -33,14 +33,29 @@ class MeResponse(BaseModel):
     name: str
     has_preferences: bool
 
+class MemePayload(BaseModel):
+    title: Optional[str] = Field(default=None, max_length=300)
+    image_url: Optional[str] = Field(default=None, max_length=2048)
+    post_url: Optional[str] = Field(default=None, max_length=2048)
+    subreddit: Optional[str] = Field(default=None, max_length=100)
+    source: Optional[str] = Field(default=None, max_length=50)
+
 class VoteRequest(BaseModel):
     dashboard_item_id: int
     value: int = Field(..., ge=-1, le=1)
+    # meme items only: the meme the user actually saw, persisted with the vote
+    shown_payload: Optional[MemePayload] = None
 
 class VoteResponse(BaseModel):
     dashboard_item_id: int
     value: int
 
+class VoteBatchRequest(BaseModel):
+    votes: List[VoteRequest] = Field(min_length=1, max_length=50)
+
+class VoteBatchResponse(BaseModel):
+    votes: List[VoteResponse]
+
 class DashboardItemResponse(BaseModel):
     id: int
     item_type: Literal["news", "prices", "ai", "meme"]
@@ -50,3 +65,18 @@ class DashboardItemResponse(BaseModel):
 class DashboardResponse(BaseModel):
     date: date
     items: List[DashboardItemResponse]
+
+class DashboardHistoryResponse(BaseModel):
+    days: List[DashboardResponse]  # newest first
+    next_cursor: Optional[str] = None  # pass as ?cursor= for the next (older) page
+
+class VoteAnalyticsRow(BaseModel):
+    key: str  # item type, investor type or ISO date
+    up: int
+    down: int
+    total: int
+    approval_rate: Optional[float] = None  # up / total; null without votes
+
+class VoteAnalyticsResponse(BaseModel):
+    group_by: Literal["item_type", "investor_type", "day"]
+    rows: List[VoteAnalyticsRow]
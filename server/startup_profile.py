@@ -0,0 +1,71 @@
+"""
+Import-time report for the server package, with a startup budget.
+
+    python -m startup_profile [--module main] [--top 25] [--budget-ms 1200]
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and prints
+the most expensive imports (self and cumulative), the cost per top-level package,
+and the total. Exits with status 1 when the total exceeds the budget
+(STARTUP_BUDGET_MS), so it can gate CI or a deploy.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+DEFAULT_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1200"))
+
+
+def collect(module: str) -> list[tuple[str, int, int, int]]:
+    """(name, depth, self_us, cumulative_us) for every import, in import order."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr[-2000:])
+        raise SystemExit(f"import {module} failed")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args()
+
+    rows = collect(args.module)
+    total_ms = sum(r[2] for r in rows) / 1000
+
+    print(f"{'cumulative':>11} {'self':>9}  module")
+    for name, depth, self_us, cum_us in sorted(rows, key=lambda r: r[3], reverse=True)[: args.top]:
+        print(f"{cum_us / 1000:9.1f}ms {self_us / 1000:7.1f}ms  {'  ' * depth}{name}")
+
+    by_package = defaultdict(int)
+    for name, _, self_us, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+    print("\nper top-level package (self time):")
+    for pkg, us in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[: args.top]:
+        print(f"{us / 1000:9.1f}ms  {pkg}")
+
+    print(f"\ntotal import time for {args.module}: {total_ms:.1f}ms (budget {args.budget_ms:.0f}ms)")
+    if total_ms > args.budget_ms:
+        print("OVER BUDGET")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
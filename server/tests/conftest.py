@@ -0,0 +1,134 @@
+"""
+Test setup: the app on a throwaway SQLite database, called in-process through httpx.
+
+Upstream providers point at a closed port, so a test that reaches one fails fast
+instead of going to the network; tests seed the day's items and the meme pool instead.
+"""
+import os
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.common import bootstrap_env  # noqa: E402
+
+_NOWHERE = "http://127.0.0.1:9"
+bootstrap_env({
+    "COINGECKO_BASE_URL": _NOWHERE,
+    "CRYPTOPANIC_BASE_URL": _NOWHERE,
+    "HF_ROUTER_BASE_URL": _NOWHERE,
+    "REDDIT_BASE_URL": _NOWHERE,
+    "MEME_PREFETCH": "0",
+})
+
+import httpx  # noqa: E402
+
+from auth_utils import create_access_token  # noqa: E402
+from db import Base, SessionLocal, async_engine, engine  # noqa: E402
+from models import DashboardItem, User  # noqa: E402
+from payload_store import store_payload_sync  # noqa: E402
+
+Base.metadata.create_all(engine)
+
+MEME = {
+    "title": "Test meme",
+    "image_url": "https://i.example/meme.png",
+    "post_url": "https://www.reddit.com/r/cryptomemes/comments/1",
+    "subreddit": "r/cryptomemes",
+    "source": "reddit",
+}
+PAYLOADS = {
+    "news": {"items": [{"title": "Headline", "url": "https://news.example/1"}]},
+    "prices": {"prices": {"BTC": 100000.0, "ETH": 4000.0}},
+    "ai": {"text": "Stay diversified."},
+    "meme": MEME,
+}
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def client():
+    from main import app
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+    # pooled aiosqlite connections belong to this test's event loop
+    await async_engine.dispose()
+
+
+_users = 0
+
+
+def _create_user(items: dict) -> tuple[int, dict]:
+    global _users
+    _users += 1
+    with SessionLocal() as db:
+        u = User(email=f"user{_users}@example.com", name="Test", password_hash="x")
+        db.add(u)
+        db.flush()
+        for item_type, body in items.items():
+            db.add(DashboardItem(
+                user_id=u.id, date=date.today(), item_type=item_type, payload_hash=store_payload_sync(db, body)
+            ))
+        db.commit()
+        user_id = u.id
+    return user_id, {"Authorization": f"Bearer {create_access_token(str(user_id))}"}
+
+
+@pytest.fixture
+def user():
+    """A new user with today's four dashboard items; returns (user_id, auth headers)."""
+    return _create_user(PAYLOADS)
+
+
+@pytest.fixture
+def new_user():
+    """A new user without any dashboard items yet."""
+    return _create_user({})
+
+
+@pytest.fixture
+def make_user():
+    """Factory for more than one user with today's items."""
+    return lambda: _create_user(PAYLOADS)
+
+
+@pytest.fixture
+def add_items():
+    """Adds a user's items for past days: add_items(user_id, days, item_types)."""
+    def add(user_id: int, days: list[date], item_types=("news", "prices")) -> None:
+        with SessionLocal() as db:
+            for day in days:
+                for item_type in item_types:
+                    db.add(DashboardItem(
+                        user_id=user_id, date=day, item_type=item_type,
+                        payload_hash=store_payload_sync(db, PAYLOADS[item_type]),
+                    ))
+            db.commit()
+    return add
+
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    """An empty retention archive for this test."""
+    import retention
+
+    monkeypatch.setattr(retention, "ARCHIVE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+async def meme_pool():
+    """A fresh meme pool in the cache, so the per-view meme needs no Reddit call."""
+    from integrations import reddit_memes
+
+    pool = [MEME] + [{**MEME, "image_url": f"https://i.example/meme{n}.png"} for n in range(1, 8)]
+    await reddit_memes._CACHE.set(reddit_memes._POOL_KEY, pool)
+    yield pool
+    await reddit_memes._CACHE.clear()
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from integrations.cache import TTLCache
+from integrations.cache_backends import MemoryBackend, RedisBackend, SqliteBackend
+
+pytestmark = pytest.mark.anyio
+
+BACKENDS = ["memory", "sqlite", "redis"]
+
+
+@pytest.fixture
+def make_backend(request, tmp_path):
+    """Factory for backends of one kind; every backend it makes shares the same store."""
+    kind = request.param
+    if kind == "memory":
+        shared = {}
+        return lambda max_entries: shared.setdefault("backend", MemoryBackend(max_entries))
+    if kind == "sqlite":
+        path = str(tmp_path / "cache.db")
+
+        def sqlite(max_entries):
+            backend = SqliteBackend(path, "test", max_entries)
+            backend.PRUNE_EVERY = 1
+            return backend
+        return sqlite
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    return lambda max_entries: RedisBackend(client, "test", max_entries)
+
+
+@pytest.mark.parametrize("make_backend", BACKENDS, indirect=True)
+async def test_ttl_expiry_and_stats(make_backend):
+    cache = TTLCache(ttl_seconds=0.1, retain_seconds=0.3, backend=make_backend(10))
+    await cache.set(("BTC", "ETH"), {"usd": [1, 2]})
+
+    assert await cache.get(("BTC", "ETH")) == {"usd": [1, 2]}
+    assert await cache.get("missing") is None
+    await asyncio.sleep(0.15)
+    # past the TTL: a miss, but still retained for peek()
+    assert await cache.get(("BTC", "ETH")) is None
+    assert await cache.peek(("BTC", "ETH")) == {"usd": [1, 2]}
+    await asyncio.sleep(0.2)
+    assert await cache.peek(("BTC", "ETH")) is None
+
+    stats = await cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 2, 0)
+    assert stats["hit_ratio"] == round(1 / 3, 3)
+
+
+@pytest.mark.parametrize("make_backend", BACKENDS, indirect=True)
+async def test_eviction_at_max_entries(make_backend, request):
+    cache = TTLCache(ttl_seconds=60, backend=make_backend(3))
+    for key in ("a", "b", "c"):
+        await cache.set(key, key)
+        await asyncio.sleep(0.01)
+    await cache.get("a")
+    await cache.set("d", "d")
+
+    stats = await cache.stats()
+    assert stats["size"] == 3
+    assert stats["evictions"] == 1
+    # memory and redis evict the least recently used; sqlite the oldest written
+    evicted = "a" if isinstance(cache.backend, SqliteBackend) else "b"
+    assert [await cache.peek(k) for k in "abcd"] == [None if k == evicted else k for k in "abcd"]
+
+
+@pytest.mark.parametrize("make_backend", BACKENDS, indirect=True)
+async def test_lease_is_exclusive_until_it_expires(make_backend):
+    # two workers sharing the store, each with a one-entry cache (like the meme pool)
+    worker1 = TTLCache(ttl_seconds=60, max_entries=1, backend=make_backend(1))
+    worker2 = TTLCache(ttl_seconds=60, max_entries=1, backend=make_backend(1))
+    await worker1.set("posts", ["meme"])
+
+    assert await worker1.acquire_lease("posts", 0.2)
+    assert not await worker2.acquire_lease("posts", 0.2)
+    assert not await worker1.acquire_lease("posts", 0.2)
+    await asyncio.sleep(0.25)
+    assert await worker2.acquire_lease("posts", 0.2)
+
+    # leases are kept apart from the entries: the pool wasn't evicted
+    assert await worker1.get("posts") == ["meme"]
+    assert (await worker1.stats())["size"] == 1
@@ -0,0 +1,87 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import event
+
+from db import async_engine
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def statements():
+    seen = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    yield seen
+    event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+
+
+async def test_warm_dashboard_is_one_statement(client, user, meme_pool, statements):
+    _, headers = user
+    # first request caches the principal and the payload bodies
+    r = await client.get("/dashboard", headers=headers)
+    assert r.status_code == 200
+    assert [i["item_type"] for i in r.json()["items"]] == ["news", "prices", "ai", "meme"]
+
+    statements.clear()
+    r = await client.get("/dashboard", headers=headers)
+    assert r.status_code == 200
+    assert len(statements) == 1, statements
+
+
+async def test_revalidation_is_one_statement(client, user, meme_pool, statements):
+    _, headers = user
+    r = await client.get("/dashboard", headers=headers)
+    etag = r.headers["etag"]
+
+    statements.clear()
+    r = await client.get("/dashboard", headers={**headers, "If-None-Match": etag})
+    assert r.status_code == 304
+    assert len(statements) == 1, statements
+
+
+async def test_first_stream_shows_the_dashboard_meme(client, new_user, meme_pool):
+    _, headers = new_user
+    async with client.stream("GET", "/dashboard/stream", headers=headers) as r:
+        lines = [json.loads(line) async for line in r.aiter_lines()]
+    streamed = {l["item"]["item_type"]: l["item"] for l in lines if l["type"] == "item"}
+
+    r = await client.get("/dashboard", headers=headers)
+    items = {i["item_type"]: i for i in r.json()["items"]}
+    assert streamed["meme"]["id"] == items["meme"]["id"]
+    assert streamed["meme"]["payload"] == items["meme"]["payload"]
+
+
+async def _healthy_prices(assets):
+    return {"prices_usd": {"BTC": 1.0}, "source": "coingecko"}
+
+
+@pytest.mark.parametrize("failure", ["slow", "error payload"])
+async def test_degraded_item_is_refetched(client, new_user, meme_pool, monkeypatch, failure):
+    import dashboard_routes
+
+    async def slow_prices(assets):
+        await asyncio.sleep(1)
+        return await _healthy_prices(assets)
+
+    async def error_prices(assets):
+        return {"prices_usd": {}, "error": "upstream said no"}
+
+    monkeypatch.setitem(dashboard_routes.FETCH_DEADLINES, "prices", 0.05)
+    monkeypatch.setattr(dashboard_routes, "fetch_prices_usd", slow_prices if failure == "slow" else error_prices)
+    _, headers = new_user
+    r = await client.get("/dashboard", headers=headers)
+    first = {i["item_type"]: i for i in r.json()["items"]}
+    assert len(first) == 4  # the other items aren't held up
+    assert dashboard_routes.is_degraded(first["prices"]["payload"])
+
+    monkeypatch.setattr(dashboard_routes, "fetch_prices_usd", _healthy_prices)
+    r = await client.get("/dashboard", headers=headers)
+    second = {i["item_type"]: i for i in r.json()["items"]}
+    assert second["prices"]["id"] == first["prices"]["id"]
+    assert second["prices"]["payload"] == await _healthy_prices(["BTC"])
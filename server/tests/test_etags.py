@@ -0,0 +1,54 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+PREFS = {"assets": ["BTC", "ETH"], "investor_type": "HODLer", "content_types": ["news", "prices"]}
+
+
+async def revalidate(client, path, headers, etag):
+    return await client.get(path, headers={**headers, "If-None-Match": etag})
+
+
+async def test_preferences_etag(client, new_user):
+    _, headers = new_user
+    assert (await client.post("/preferences", headers=headers, json=PREFS)).status_code == 200
+
+    r = await client.get("/preferences", headers=headers)
+    assert r.status_code == 200
+    assert r.json() == PREFS
+    etag = r.headers["etag"]
+    assert r.headers["cache-control"] == "private, no-cache"
+
+    for header in (etag, f"W/{etag}", f'"other", {etag}'):
+        r = await revalidate(client, "/preferences", headers, header)
+        assert r.status_code == 304
+        assert r.headers["etag"] == etag
+        assert r.content == b""
+
+    # same second on SQLite, but the changed fields still change the tag
+    changed = {**PREFS, "assets": ["SOL"]}
+    assert (await client.post("/preferences", headers=headers, json=changed)).status_code == 200
+    r = await revalidate(client, "/preferences", headers, etag)
+    assert r.status_code == 200
+    assert r.json() == changed
+    assert r.headers["etag"] != etag
+
+
+async def test_me_etag(client, new_user):
+    _, headers = new_user
+    r = await client.get("/me", headers=headers)
+    assert r.status_code == 200
+    assert r.json()["has_preferences"] is False
+    etag = r.headers["etag"]
+
+    r = await revalidate(client, "/me", headers, etag)
+    assert r.status_code == 304
+    assert r.headers["etag"] == etag
+
+    # saving preferences flips has_preferences, so the old tag no longer matches
+    assert (await client.post("/preferences", headers=headers, json=PREFS)).status_code == 200
+    r = await revalidate(client, "/me", headers, etag)
+    assert r.status_code == 200
+    assert r.json()["has_preferences"] is True
+    assert r.headers["etag"] != etag
+    assert (await revalidate(client, "/me", headers, r.headers["etag"])).status_code == 304
@@ -0,0 +1,57 @@
+import httpx
+import pytest
+
+from integrations import hf_ai
+
+pytestmark = pytest.mark.anyio
+
+PREFS = {"assets": ["BTC"], "investor_type": "HODLer", "content_types": ["Market News"]}
+INSIGHT = {"choices": [{"message": {"content": "Rebalance monthly."}}]}
+
+
+@pytest.fixture
+async def hf(monkeypatch):
+    """Point the HF integration at a mock router; set hf.status to make it fail."""
+    state = type("HF", (), {"status": 200})()
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(state.status, json=INSIGHT if state.status == 200 else {"error": "overloaded"})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(respond))
+    monkeypatch.setattr(hf_ai, "HF_TOKEN", "test")
+    monkeypatch.setattr(hf_ai, "get_client", lambda provider: client)
+    await hf_ai._INSIGHT_CACHE.clear()
+    await hf_ai._LAST_GOOD_INSIGHT.clear()
+    yield state
+    await client.aclose()
+    await hf_ai._INSIGHT_CACHE.clear()
+    await hf_ai._LAST_GOOD_INSIGHT.clear()
+
+
+async def test_provider_error_is_not_persisted(client, new_user, meme_pool, hf):
+    from dashboard_routes import is_degraded
+
+    _, headers = new_user
+    hf.status = 503
+    r = await client.get("/dashboard", headers=headers)
+    first = {i["item_type"]: i for i in r.json()["items"]}["ai"]
+    assert is_degraded(first["payload"])
+    assert (await hf_ai._INSIGHT_CACHE.stats())["size"] == 0
+
+    hf.status = 200
+    r = await client.get("/dashboard", headers=headers)
+    second = {i["item_type"]: i for i in r.json()["items"]}["ai"]
+    assert second["id"] == first["id"]
+    assert second["payload"]["text"] == "Rebalance monthly."
+
+
+async def test_provider_error_serves_last_good_as_stale(hf):
+    good = await hf_ai.fetch_ai_insight(PREFS)
+    assert good["text"] == "Rebalance monthly."
+
+    hf.status = 500
+    await hf_ai._INSIGHT_CACHE.clear()
+    stale = await hf_ai.fetch_ai_insight(PREFS)
+    assert stale == {**good, "stale": True}
+    # not cached: the next miss asks the provider again
+    assert (await hf_ai._INSIGHT_CACHE.stats())["size"] == 0
@@ -0,0 +1,112 @@
+import base64
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+
+import retention
+from db import SessionLocal
+from models import DashboardItem
+
+pytestmark = pytest.mark.anyio
+
+TODAY = date.today()
+LIVE_DAYS = [TODAY - timedelta(days=n) for n in range(10)]
+ARCHIVED_DAYS = [TODAY - timedelta(days=n) for n in range(20, 25)]
+
+
+def archived(user_id: int, days: list[date], item_types=("news", "prices"), first_id: int = 1_000_000) -> list[dict]:
+    """Archive records like retention writes them, for items that were never in the database."""
+    return [
+        {
+            "id": first_id + user_id * 100 + n,
+            "user_id": user_id,
+            "date": day.isoformat(),
+            "item_type": item_type,
+            "payload": {"archived": item_type},
+            "created_at": day.isoformat(),
+            "votes": [],
+        }
+        for n, (day, item_type) in enumerate((d, t) for d in days for t in item_types)
+    ]
+
+
+@pytest.fixture
+def history_user(new_user, add_items, archive_dir):
+    """Two items a day: ten live days ending today, five archived days further back."""
+    user_id, headers = new_user
+    add_items(user_id, LIVE_DAYS)
+    retention.write_archive(archived(user_id, ARCHIVED_DAYS))
+    return user_id, headers
+
+
+async def walk(client, headers, **params) -> list[dict]:
+    pages, cursor = [], None
+    for _ in range(50):
+        r = await client.get(
+            "/dashboard/history", headers=headers, params={**params, **({"cursor": cursor} if cursor else {})}
+        )
+        assert r.status_code == 200, r.text
+        pages.append(r.json())
+        cursor = pages[-1]["next_cursor"]
+        if cursor is None:
+            return pages
+    raise AssertionError("next_cursor never ran out")
+
+
+def dates(pages: list[dict]) -> list[date]:
+    return [date.fromisoformat(d["date"]) for page in pages for d in page["days"]]
+
+
+@pytest.mark.parametrize("limit, sizes", [(3, [3, 3, 3, 1]), (5, [5, 5]), (14, [10])])
+async def test_walk_all_pages(client, history_user, limit, sizes):
+    _, headers = history_user
+    pages = await walk(client, headers, limit=limit)
+
+    assert [len(p["days"]) for p in pages] == sizes
+    # every live day exactly once, newest first; archived days only on request
+    assert dates(pages) == LIVE_DAYS
+    assert all(len(d["items"]) == 2 for p in pages for d in p["days"])
+    assert pages[-1]["next_cursor"] is None
+
+
+async def test_bounds_with_archived_days(client, history_user):
+    _, headers = history_user
+    start, end = ARCHIVED_DAYS[2], LIVE_DAYS[2]
+    pages = await walk(client, headers, limit=3, start=start.isoformat(), end=end.isoformat(), include_archived=True)
+
+    assert dates(pages) == LIVE_DAYS[2:] + ARCHIVED_DAYS[:3]
+    assert all(len(d["items"]) == 2 for p in pages for d in p["days"])
+    assert [len(p["days"]) for p in pages] == [3, 3, 3, 2]
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    "%%%",
+    base64.urlsafe_b64encode(b"yesterday").decode(),
+    base64.urlsafe_b64encode(b"\xff\xfe\xfd").decode(),
+])
+async def test_malformed_cursor_is_400(client, history_user, cursor):
+    _, headers = history_user
+    r = await client.get("/dashboard/history", headers=headers, params={"cursor": cursor})
+    assert r.status_code == 400
+    assert r.json() == {"detail": "Invalid cursor"}
+
+
+async def test_partially_archived_day_is_merged(client, new_user, add_items, archive_dir):
+    user_id, headers = new_user
+    add_items(user_id, LIVE_DAYS[:3])
+    with SessionLocal() as db:
+        live_news = db.scalar(select(DashboardItem.id).where(
+            DashboardItem.user_id == user_id, DashboardItem.date == LIVE_DAYS[2], DashboardItem.item_type == "news"
+        ))
+    # the oldest live day is half archived, one of its live items twice (a re-run after a crash)
+    split_day = archived(user_id, [LIVE_DAYS[2]], ("ai", "meme"))
+    retention.write_archive(split_day + [{**split_day[0], "id": live_news, "item_type": "news"}])
+    retention.write_archive(archived(user_id, ARCHIVED_DAYS[:1], first_id=2_000_000))
+
+    for limit in (14, 2):
+        pages = await walk(client, headers, limit=limit, include_archived=True)
+        days = {d["date"]: [i["item_type"] for i in d["items"]] for p in pages for d in p["days"]}
+        assert list(days) == [d.isoformat() for d in LIVE_DAYS[:3] + ARCHIVED_DAYS[:1]]
+        assert days[LIVE_DAYS[2].isoformat()] == ["news", "prices", "ai", "meme"]
@@ -0,0 +1,48 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+
+import retention
+from db import AsyncSessionLocal, SessionLocal
+from models import DashboardItem
+
+pytestmark = pytest.mark.anyio
+
+TODAY = date.today()
+OLD_DAYS = [TODAY - timedelta(days=41), TODAY - timedelta(days=40)]
+ITEM_TYPES = ("news", "prices", "ai", "meme")
+
+
+async def test_archive_moves_whole_user_days(client, make_user, add_items, archive_dir, monkeypatch):
+    users = [make_user() for _ in range(3)]
+    for user_id, _ in users:
+        add_items(user_id, OLD_DAYS, ITEM_TYPES)
+    batches = []
+    write_archive = retention.write_archive
+
+    def record_batch(records, shards):
+        batches.append(records)
+        write_archive(records, shards)
+
+    monkeypatch.setattr(retention, "write_archive", record_batch)
+
+    async with AsyncSessionLocal() as db:
+        # 3 doesn't divide a user's 4 items a day
+        await retention.archive_expired(db, TODAY - timedelta(days=30), batch_size=3, pause=0)
+
+    ours = {user_id for user_id, _ in users}
+    batch_of = {}
+    for n, records in enumerate(batches):
+        for r in records:
+            if r["user_id"] in ours:
+                assert batch_of.setdefault((r["user_id"], r["date"]), n) == n, "a user's day was split"
+    assert len(batch_of) == 6
+    with SessionLocal() as db:
+        assert db.scalars(select(DashboardItem.date).where(DashboardItem.user_id.in_(ours))).all() == [TODAY] * 12
+
+    user_id, headers = users[0]
+    r = await client.get("/dashboard/history", headers=headers, params={"include_archived": True})
+    assert [(d["date"], len(d["items"])) for d in r.json()["days"]] == [
+        (TODAY.isoformat(), 4), (OLD_DAYS[1].isoformat(), 4), (OLD_DAYS[0].isoformat(), 4)
+    ]
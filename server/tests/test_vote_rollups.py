@@ -0,0 +1,79 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from db import AsyncSessionLocal
+from models import DashboardItem, VoteRollup
+from vote_rollups import compare
+
+pytestmark = pytest.mark.anyio
+
+
+async def _item_ids(user_id: int) -> dict[str, int]:
+    async with AsyncSessionLocal() as db:
+        rows = await db.execute(
+            select(DashboardItem.item_type, DashboardItem.id).where(DashboardItem.user_id == user_id)
+        )
+        return dict(rows.all())
+
+
+async def _set_profile(client, headers, investor_type: str) -> None:
+    r = await client.post(
+        "/preferences",
+        json={"assets": ["BTC"], "investor_type": investor_type, "content_types": ["Market News"]},
+        headers=headers,
+    )
+    assert r.status_code == 200
+
+
+async def _rollups(*investor_types: str) -> dict[tuple, tuple]:
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(VoteRollup).where(VoteRollup.day == date.today(), VoteRollup.investor_type.in_(investor_types))
+        )).scalars()
+        return {(r.investor_type, r.item_type): (r.up, r.down) for r in rows if r.up or r.down}
+
+
+async def test_rollups_follow_votes_and_profile_changes(client, make_user):
+    alice, alice_headers = make_user()
+    bob, bob_headers = make_user()
+    a, b = await _item_ids(alice), await _item_ids(bob)
+    await _set_profile(client, bob_headers, "Rollup A")
+
+    async def vote(headers, item_id, value):
+        r = await client.post("/votes", json={"dashboard_item_id": item_id, "value": value}, headers=headers)
+        assert r.status_code == 200
+
+    # alice, no preferences yet: new vote, repeated click, flip, then a batch
+    await vote(alice_headers, a["news"], 1)
+    await vote(alice_headers, a["news"], 1)
+    await vote(alice_headers, a["news"], -1)
+    r = await client.post(
+        "/votes/batch",
+        json={"votes": [
+            {"dashboard_item_id": a["ai"], "value": 1},
+            {"dashboard_item_id": a["prices"], "value": -1},
+            {"dashboard_item_id": a["meme"], "value": 1},
+        ]},
+        headers=alice_headers,
+    )
+    assert r.status_code == 200
+    await vote(bob_headers, b["news"], 1)
+    await vote(bob_headers, b["ai"], -1)
+
+    # profile changes move the votes already cast; later votes count under the new profile
+    await _set_profile(client, alice_headers, "Rollup A")
+    await _set_profile(client, bob_headers, "Rollup B")
+    await vote(bob_headers, b["ai"], 1)
+
+    assert await _rollups("Rollup A", "Rollup B") == {
+        ("Rollup A", "news"): (0, 1),
+        ("Rollup A", "ai"): (1, 0),
+        ("Rollup A", "prices"): (0, 1),
+        ("Rollup A", "meme"): (1, 0),
+        ("Rollup B", "news"): (1, 0),
+        ("Rollup B", "ai"): (1, 0),
+    }
+    async with AsyncSessionLocal() as db:
+        assert await compare(db) == []
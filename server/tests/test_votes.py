@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from db import AsyncSessionLocal
+from models import DashboardItem, Vote
+from vote_rollups import compare
+
+pytestmark = pytest.mark.anyio
+
+
+async def _item_ids(user_id: int) -> dict[str, int]:
+    async with AsyncSessionLocal() as db:
+        rows = await db.execute(
+            select(DashboardItem.item_type, DashboardItem.id).where(DashboardItem.user_id == user_id)
+        )
+        return dict(rows.all())
+
+
+async def _votes(user_id: int) -> list[Vote]:
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(Vote).where(Vote.user_id == user_id))).scalars().all()
+
+
+async def test_concurrent_double_click_leaves_one_row(client, user):
+    user_id, headers = user
+    news = (await _item_ids(user_id))["news"]
+    responses = await asyncio.gather(
+        client.post("/votes", json={"dashboard_item_id": news, "value": 1}, headers=headers),
+        client.post("/votes", json={"dashboard_item_id": news, "value": -1}, headers=headers),
+    )
+    assert [r.status_code for r in responses] == [200, 200]
+
+    [vote] = await _votes(user_id)
+    # whichever upsert ran second replaced the first one's value
+    assert vote.value in (1, -1)
+    assert vote.previous_value == -vote.value
+    async with AsyncSessionLocal() as db:
+        assert await compare(db) == []
+
+
+async def test_batch_with_another_users_item_is_rejected(client, make_user):
+    alice, alice_headers = make_user()
+    bob, _ = make_user()
+    mine, theirs = await _item_ids(alice), await _item_ids(bob)
+
+    r = await client.post(
+        "/votes/batch",
+        json={"votes": [
+            {"dashboard_item_id": mine["news"], "value": 1},
+            {"dashboard_item_id": theirs["news"], "value": 1},
+        ]},
+        headers=alice_headers,
+    )
+    assert r.status_code == 403
+    assert await _votes(alice) == []
+    assert await _votes(bob) == []
+
+
+async def test_unknown_item_is_404(client, user):
+    user_id, headers = user
+    news = (await _item_ids(user_id))["news"]
+    r = await client.post("/votes", json={"dashboard_item_id": 10**9, "value": 1}, headers=headers)
+    assert r.status_code == 404
+    r = await client.post(
+        "/votes/batch",
+        json={"votes": [{"dashboard_item_id": news, "value": 1}, {"dashboard_item_id": 10**9, "value": -1}]},
+        headers=headers,
+    )
+    assert r.status_code == 404
+    assert await _votes(user_id) == []
+
+
+async def test_batch_keeps_rollups_consistent(client, user):
+    user_id, headers = user
+    ids = await _item_ids(user_id)
+    for values in ({"news": 1, "ai": -1}, {"news": -1, "ai": -1, "prices": 1}):
+        r = await client.post(
+            "/votes/batch",
+            json={"votes": [{"dashboard_item_id": ids[t], "value": v} for t, v in values.items()]},
+            headers=headers,
+        )
+        assert r.status_code == 200
+    votes = {v.dashboard_item_id: (v.value, v.previous_value) for v in await _votes(user_id)}
+    assert votes == {ids["news"]: (-1, 1), ids["ai"]: (-1, -1), ids["prices"]: (1, None)}
+    async with AsyncSessionLocal() as db:
+        assert await compare(db) == []
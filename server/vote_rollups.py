@@ -0,0 +1,189 @@
+"""
+Vote rollups: up/down counters per (dashboard day, item type, voter investor type).
+
+Aggregates over raw votes join dashboard_items and preferences and scan every vote.
+These counters are kept in step with each write instead, so GET /analytics/votes only
+reads the small vote_rollups table:
+
+- votes_routes: the vote upsert returns each vote's previous value (votes.previous_value),
+  and record_votes() adds the difference: +1 for a new vote, one count moved between up
+  and down for a flip, nothing for a repeated click.
+- preferences_routes: a changed investor_type moves the user's counts to the new bucket
+  (move_user_votes), so votes are always counted under the voter's current profile.
+
+Archived votes (retention.py) stay counted. If counters drift (users deleted, a vote
+racing a preference change), rebuild them from the raw votes:
+
+    python vote_rollups.py rebuild [--since YYYY-MM-DD]
+    python vote_rollups.py check     # exit code 1 if the rollups differ from the raw votes
+"""
+import argparse
+import asyncio
+import sys
+from datetime import date
+from typing import Iterable
+
+from sqlalchemy import case, delete, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from db import dialect_insert
+from models import DashboardItem, Preferences, Vote, VoteRollup
+
+NO_PROFILE = "unknown"
+
+_UP = func.sum(case((Vote.value == 1, 1), else_=0))
+_DOWN = func.sum(case((Vote.value == -1, 1), else_=0))
+
+
+def raw_aggregates(since: date | None = None):
+    """The rollups computed from scratch: (day, item_type, investor_type, up, down)."""
+    investor_type = func.coalesce(Preferences.investor_type, NO_PROFILE)
+    stmt = (
+        select(DashboardItem.date, DashboardItem.item_type, investor_type, _UP, _DOWN)
+        .select_from(Vote)
+        .join(DashboardItem, Vote.dashboard_item_id == DashboardItem.id)
+        .outerjoin(Preferences, Preferences.user_id == Vote.user_id)
+        .group_by(DashboardItem.date, DashboardItem.item_type, investor_type)
+    )
+    if since is not None:
+        stmt = stmt.where(DashboardItem.date >= since)
+    return stmt
+
+
+def _increment_statement(insert_, deltas: dict[tuple, list[int]]):
+    # sorted, so concurrent writers lock rollup rows in the same order
+    rows = [
+        {"day": day, "item_type": item_type, "investor_type": investor_type, "up": up, "down": down}
+        for (day, item_type, investor_type), (up, down) in sorted(deltas.items())
+        if up or down
+    ]
+    if not rows:
+        return None
+    stmt = insert_(VoteRollup).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=["day", "item_type", "investor_type"],
+        set_={"up": VoteRollup.up + stmt.excluded.up, "down": VoteRollup.down + stmt.excluded.down},
+    )
+
+
+def _count(counts: list[int], value: int, sign: int) -> None:
+    counts[0 if value == 1 else 1] += sign
+
+
+async def record_votes(db: AsyncSession, rows: Iterable) -> None:
+    """
+    Apply just-upserted votes (rows with dashboard_item_id, value, previous_value) to the
+    rollups in the caller's transaction. Repeated clicks cost nothing; otherwise one
+    lookup of the items' day/type and one upsert.
+    """
+    changed = {r.dashboard_item_id: (r.value, r.previous_value) for r in rows if r.value != r.previous_value}
+    if not changed:
+        return
+    items = await db.execute(
+        select(
+            DashboardItem.id,
+            DashboardItem.date,
+            DashboardItem.item_type,
+            func.coalesce(Preferences.investor_type, NO_PROFILE),
+        )
+        .outerjoin(Preferences, Preferences.user_id == DashboardItem.user_id)
+        .where(DashboardItem.id.in_(list(changed)))
+    )
+    deltas: dict[tuple, list[int]] = {}
+    for item_id, day, item_type, investor_type in items:
+        value, previous = changed[item_id]
+        counts = deltas.setdefault((day, item_type, investor_type), [0, 0])
+        _count(counts, value, 1)
+        if previous is not None:
+            _count(counts, previous, -1)
+
+    stmt = _increment_statement(dialect_insert(db), deltas)
+    if stmt is not None:
+        await db.execute(stmt)
+
+
+def move_user_votes(db: Session, user_id: int, old_type: str | None, new_type: str) -> None:
+    """Move a user's counts between investor-type buckets (their preferences changed)."""
+    old_type = old_type or NO_PROFILE
+    if old_type == new_type:
+        return
+    counts = db.execute(
+        select(DashboardItem.date, DashboardItem.item_type, _UP, _DOWN)
+        .select_from(Vote)
+        .join(DashboardItem, Vote.dashboard_item_id == DashboardItem.id)
+        .where(Vote.user_id == user_id)
+        .group_by(DashboardItem.date, DashboardItem.item_type)
+    )
+    deltas: dict[tuple, list[int]] = {}
+    for day, item_type, up, down in counts:
+        deltas[(day, item_type, old_type)] = [-up, -down]
+        deltas[(day, item_type, new_type)] = [up, down]
+    stmt = _increment_statement(dialect_insert(db), deltas)
+    if stmt is not None:
+        db.execute(stmt)
+
+
+async def _default_since(db: AsyncSession) -> date | None:
+    # older days were archived (retention.py): their raw votes are gone, keep their counts
+    return (await db.execute(select(func.min(DashboardItem.date)))).scalar()
+
+
+async def rebuild(db: AsyncSession, since: date | None = None) -> int:
+    """Recompute the rollups for days >= `since` from raw votes, in one transaction."""
+    since = since or await _default_since(db)
+    if since is None:
+        return 0
+    if db.get_bind().dialect.name == "postgresql":
+        # votes arriving meanwhile wait and apply their increments on top of the rebuilt rows
+        await db.execute(text("LOCK TABLE vote_rollups IN EXCLUSIVE MODE"))
+    await db.execute(delete(VoteRollup).where(VoteRollup.day >= since))
+    result = await db.execute(
+        insert(VoteRollup).from_select(["day", "item_type", "investor_type", "up", "down"], raw_aggregates(since))
+    )
+    await db.commit()
+    return max(result.rowcount or 0, 0)
+
+
+async def compare(db: AsyncSession, since: date | None = None) -> list[tuple]:
+    """Buckets whose rollup differs from the raw votes: (key, (up, down) rollup, (up, down) raw)."""
+    since = since or await _default_since(db)
+    if since is None:
+        return []
+    raw = {(d, t, i): (up, down) for d, t, i, up, down in await db.execute(raw_aggregates(since))}
+    rolled = {
+        (r.day, r.item_type, r.investor_type): (r.up, r.down)
+        for r in (await db.execute(select(VoteRollup).where(VoteRollup.day >= since))).scalars()
+    }
+    return [
+        (key, rolled.get(key, (0, 0)), raw.get(key, (0, 0)))
+        for key in sorted(raw.keys() | rolled.keys())
+        if rolled.get(key, (0, 0)) != raw.get(key, (0, 0))
+    ]
+
+
+async def _main(args) -> int:
+    from db import AsyncSessionLocal, async_engine
+
+    since = date.fromisoformat(args.since) if args.since else None
+    try:
+        async with AsyncSessionLocal() as db:
+            if args.command == "rebuild":
+                print(f"rebuilt {await rebuild(db, since)} rollup rows")
+                return 0
+            mismatches = await compare(db, since)
+    finally:
+        await async_engine.dispose()
+    for key, rolled, raw in mismatches:
+        print(f"{key}: rollup up/down={rolled} raw={raw}")
+    print(f"{len(mismatches)} mismatched buckets")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vote rollup maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, help in (("rebuild", "recompute rollups from raw votes"), ("check", "compare rollups with raw votes")):
+        cmd = sub.add_parser(name, help=help)
+        cmd.add_argument("--since", help="first day (YYYY-MM-DD); default: oldest day not archived")
+    sys.exit(asyncio.run(_main(parser.parse_args())))
@@ -1,44 +1,109 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import case, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from db import get_db
-from deps import get_current_user
-from models import Vote, DashboardItem, User
-from schemas import VoteRequest, VoteResponse
+from db import get_async_db, dialect_insert
+from integrations.reddit_memes import pooled_meme
+from deps import CurrentUser, get_current_principal
+from models import Vote, DashboardItem
+from payload_store import payload_hash, store_payloads
+from schemas import MemePayload, VoteRequest, VoteResponse, VoteBatchRequest, VoteBatchResponse
+from vote_rollups import record_votes
 
 router = APIRouter(prefix="/votes", tags=["votes"])
 
 
-@router.post("", response_model=VoteResponse)
-def upsert_vote(
-    payload: VoteRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    if payload.value not in (-1, 1):
-        raise HTTPException(status_code=422, detail="Vote value must be -1 or 1")
+def vote_upsert_statement(insert, user_id: int, values: dict[int, int]):
+    """
+    INSERT ... SELECT ... ON CONFLICT DO UPDATE ... RETURNING for one or more votes.
+    The SELECT only yields items owned by `user_id`, so the ownership check happens
+    in the same statement; items that are missing or not owned simply return no row.
+    previous_value comes back as NULL for a new vote and the replaced value otherwise.
+    """
+    value_expr = case(values, value=DashboardItem.id)
+    owned = select(literal(user_id), DashboardItem.id, value_expr).where(
+        DashboardItem.id.in_(list(values)),
+        DashboardItem.user_id == user_id,
+    )
+    stmt = insert(Vote).from_select(["user_id", "dashboard_item_id", "value"], owned)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "dashboard_item_id"],
+        # SET expressions see the existing row, so previous_value gets the old value
+        set_={"previous_value": Vote.value, "value": stmt.excluded.value},
+    )
+    return stmt.returning(Vote.dashboard_item_id, Vote.value, Vote.previous_value)
+
+
+async def _store_shown_memes(db: AsyncSession, user_id: int, shown: dict[int, MemePayload]) -> None:
+    """
+    Memes are picked per view and not persisted; store the one actually voted on.
+    Only memes still in the (possibly stale) pool are stored, as the pool has them, so
+    clients can't put arbitrary content on a row. Anything else is ignored.
+    """
+    items = (await db.execute(
+        select(DashboardItem.id, DashboardItem.payload_hash).where(
+            DashboardItem.id.in_(list(shown)),
+            DashboardItem.user_id == user_id,
+            DashboardItem.item_type == "meme",
+        )
+    )).all()
+    for item_id, stored_hash in items:
+        body = shown[item_id].model_dump()
+        if payload_hash(body) == stored_hash:
+            continue
+        post = await pooled_meme(body["image_url"])
+        if post is None:
+            continue
+        [shown_hash] = await store_payloads(db, [post])
+        await db.execute(update(DashboardItem).where(DashboardItem.id == item_id).values(payload_hash=shown_hash))
+
+
+async def _apply_votes(db: AsyncSession, user_id: int, votes: list[VoteRequest]) -> list[VoteResponse]:
+    for v in votes:
+        if v.value not in (-1, 1):
+            raise HTTPException(status_code=422, detail="Vote value must be -1 or 1")
 
-    item = db.query(DashboardItem).filter(DashboardItem.id == payload.dashboard_item_id).first()
-    if not item:
+    values = {v.dashboard_item_id: v.value for v in votes}
+    rows = (await db.execute(vote_upsert_statement(dialect_insert(db), user_id, values))).all()
+
+    applied = {r.dashboard_item_id for r in rows}
+    missing = [item_id for item_id in values if item_id not in applied]
+    if missing:
+        await db.rollback()
+        # slow path only: tell "doesn't exist" apart from "not yours"
+        other_owner = (
+            await db.execute(select(DashboardItem.id).where(DashboardItem.id.in_(missing)))
+        ).scalars().first()
+        if other_owner is not None:
+            raise HTTPException(status_code=403, detail="Not allowed to vote on this item")
         raise HTTPException(status_code=404, detail="Dashboard item not found")
 
-    # Optional: prevent voting on someone else's dashboard item
-    if item.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not allowed to vote on this item")
+    await record_votes(db, rows)
+
+    shown = {v.dashboard_item_id: v.shown_payload for v in votes if v.shown_payload is not None}
+    if shown:
+        await _store_shown_memes(db, user_id, shown)
+
+    await db.commit()
+    return [VoteResponse(dashboard_item_id=r.dashboard_item_id, value=r.value) for r in rows]
 
-    vote = (
-        db.query(Vote)
-        .filter(Vote.user_id == current_user.id, Vote.dashboard_item_id == payload.dashboard_item_id)
-        .first()
-    )
 
-    if not vote:
-        vote = Vote(user_id=current_user.id, dashboard_item_id=payload.dashboard_item_id, value=payload.value)
-        db.add(vote)
-    else:
-        vote.value = payload.value
+@router.post("", response_model=VoteResponse)
+async def upsert_vote(
+    payload: VoteRequest,
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
+):
+    (vote,) = await _apply_votes(db, current_user.id, [payload])
+    return vote
 
-    db.commit()
-    db.refresh(vote)
 
-    return VoteResponse(dashboard_item_id=vote.dashboard_item_id, value=vote.value)
+@router.post("/batch", response_model=VoteBatchResponse)
+async def upsert_votes_batch(
+    payload: VoteBatchRequest,
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """All-or-nothing: if any item is missing or not owned, no vote is applied."""
+    votes = await _apply_votes(db, current_user.id, payload.votes)
+    return VoteBatchResponse(votes=votes)
@@ -0,0 +1,170 @@
+"""
+Background pre-generation of daily dashboards.
+
+Computes today's prices / news / AI items (plus the meme snapshot) for every user
+with Preferences before they log in, so the first visit of the day is a pure read.
+Users are grouped by preference profile, so each distinct profile costs one set of
+upstream calls. Rows are bulk-inserted with ON CONFLICT DO NOTHING in batches that
+commit independently, so an interrupted run can simply be restarted.
+
+CLI (e.g. from cron, once per day before market open):
+
+    python warmup.py [--date YYYY-MM-DD] [--concurrency 8] [--batch-size 500]
+
+In-process: set DASHBOARD_WARMUP_AT=HH:MM (server local time) and the app schedules
+it daily from the lifespan. With several workers prefer the CLI (one run per day).
+"""
+import argparse
+import asyncio
+import os
+from datetime import date as date_type, datetime, timedelta
+
+from sqlalchemy import func, select
+
+from dashboard_routes import ITEM_TYPES, fetch_payloads, is_degraded
+from db import AsyncSessionLocal, dialect_insert
+from integrations.hf_ai import profile_key
+from integrations.rate_limit import BACKGROUND, outbound_priority
+from integrations.reddit_memes import get_random_meme
+from models import DashboardItem, Preferences
+from payload_store import store_payloads
+
+# shared per profile; the meme is picked per user from the pool
+PROFILE_ITEM_TYPES = ["news", "prices", "ai"]
+
+DEFAULT_CONCURRENCY = int(os.getenv("DASHBOARD_WARMUP_CONCURRENCY", "8"))
+DEFAULT_BATCH_SIZE = int(os.getenv("DASHBOARD_WARMUP_BATCH_SIZE", "500"))
+
+
+def _profile(prefs: Preferences) -> tuple:
+    return profile_key({
+        "assets": prefs.assets,
+        "investor_type": prefs.investor_type,
+        "content_types": prefs.content_types,
+    })
+
+
+async def _pending_preferences(db, day: date_type, after_user_id: int, limit: int) -> list[Preferences]:
+    """Next page of users (by user_id) that don't have all of today's items yet."""
+    complete = (
+        select(DashboardItem.user_id)
+        .where(DashboardItem.date == day)
+        .group_by(DashboardItem.user_id)
+        .having(func.count(DashboardItem.id) >= len(ITEM_TYPES))
+    )
+    result = await db.execute(
+        select(Preferences)
+        .where(Preferences.user_id > after_user_id, Preferences.user_id.not_in(complete))
+        .order_by(Preferences.user_id)
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+async def warm_dashboards(
+    day: date_type | None = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> dict:
+    day = day or date_type.today()
+    sem = asyncio.Semaphore(concurrency)
+    profile_payloads: dict[tuple, asyncio.Task] = {}
+    stats = {"users": 0, "profiles": 0, "rows": 0, "degraded": 0}
+
+    async def payloads_for(prefs: Preferences) -> dict:
+        key = _profile(prefs)
+        if key not in profile_payloads:
+            stats["profiles"] += 1
+
+            async def fetch():
+                # queue behind interactive dashboard requests for provider rate-limit tokens
+                async with sem:
+                    with outbound_priority(BACKGROUND):
+                        assets = prefs.assets or ["BTC", "ETH"]
+                        return await fetch_payloads(PROFILE_ITEM_TYPES, assets, prefs)
+
+            profile_payloads[key] = asyncio.ensure_future(fetch())
+        return await profile_payloads[key]
+
+    last_user_id = 0
+    async with AsyncSessionLocal() as db:
+        insert = dialect_insert(db)
+        while True:
+            page = await _pending_preferences(db, day, last_user_id, batch_size)
+            if not page:
+                break
+            last_user_id = page[-1].user_id
+
+            per_user = await asyncio.gather(*(payloads_for(p) for p in page))
+
+            rows, bodies = [], []
+            for prefs, payloads in zip(page, per_user):
+                with outbound_priority(BACKGROUND):
+                    meme = await get_random_meme()
+                payloads = {**payloads, "meme": meme}
+                for t, payload in payloads.items():
+                    if is_degraded(payload):
+                        # leave it for the user's first visit to retry
+                        stats["degraded"] += 1
+                        continue
+                    rows.append({"user_id": prefs.user_id, "date": day, "item_type": t})
+                    bodies.append(payload)
+
+            if rows:
+                # users with the same profile share bodies: one payloads row per distinct body
+                for row, h in zip(rows, await store_payloads(db, bodies)):
+                    row["payload_hash"] = h
+                result = await db.execute(
+                    insert(DashboardItem)
+                    .values(rows)
+                    .on_conflict_do_nothing(index_elements=["user_id", "date", "item_type"])
+                )
+                stats["rows"] += max(result.rowcount or 0, 0)
+            await db.commit()
+            stats["users"] += len(page)
+
+    return stats
+
+
+def _seconds_until(hh_mm: str) -> float:
+    hour, minute = (int(x) for x in hh_mm.split(":"))
+    now = datetime.now()
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    return (target - now).total_seconds()
+
+
+async def run_daily(at: str) -> None:
+    """In-process scheduler loop: warm up once a day at `at` (HH:MM)."""
+    while True:
+        await asyncio.sleep(_seconds_until(at))
+        try:
+            stats = await warm_dashboards()
+            print("dashboard warmup:", stats)
+        except Exception as e:
+            print("dashboard warmup failed:", e)
+
+
+async def _main(args) -> None:
+    from db import async_engine
+    from integrations.http_clients import close_clients
+
+    try:
+        stats = await warm_dashboards(
+            day=date_type.fromisoformat(args.date) if args.date else None,
+            concurrency=args.concurrency,
+            batch_size=args.batch_size,
+        )
+        print(stats)
+    finally:
+        await close_clients()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate today's dashboards for all users with preferences.")
+    parser.add_argument("--date", help="day to warm (YYYY-MM-DD), default today")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    asyncio.run(_main(parser.parse_args()))